@@ -7,6 +7,7 @@ from warnings import warn
 import geopandas as gpd
 import ibis
 import pandas as pd
+from libpysal.graph import Graph
 from platformdirs import user_data_dir
 
 
@@ -79,6 +80,7 @@ class DataStore:
     def __dir__(self):
         atts = [
             "acs",
+            "adjacency",
             "bea_regions",
             "blocks_2000",
             "blocks_2010",
@@ -130,6 +132,69 @@ class DataStore:
             os.path.join(os.path.dirname(os.path.abspath(__file__)), "io/lodes.csv")
         )
 
+    def adjacency(
+        self, vintage=2010, level="tract", kind="queen", states=None, geoids=None
+    ):
+        """Precomputed contiguity graph for census tracts or blockgroups.
+
+        The national graphs must first be computed and stored with
+        `geosnap.io.store_adjacency`.
+
+        Parameters
+        ----------
+        vintage : int
+            census vintage of the geographic units, one of {2000, 2010, 2020}. By
+            default 2010
+        level : str
+            geographic level, either "tract" or "bg" (blockgroup). By default "tract"
+        kind : str
+            contiguity type, either "queen" or "rook". By default "queen"
+        states : list, optional
+            subset of states (as 2-digit fips) to return
+        geoids : list, optional
+            subset of geoids to return. The nodes of the returned graph follow the
+            order of `geoids`
+
+        Returns
+        -------
+        libpysal.graph.Graph
+            contiguity graph indexed by geoid
+        """
+        local_path = pathlib.Path(
+            self.data_dir, "adjacency", f"{level}_{vintage}_{kind}.parquet"
+        )
+        if not os.path.exists(local_path):
+            raise FileNotFoundError(
+                f"No {kind} adjacency for {vintage} {level}s was found in {self.data_dir}. "
+                "Use `geosnap.io.store_adjacency()` to compute and store it"
+            )
+        t = self._con.read_parquet(local_path)
+        if states:
+            t = t.filter(t.focal.substr(0, 2).isin(states))
+        if geoids is not None:
+            t = t.filter(t.focal.isin(list(geoids)))
+        adjacency = t.to_pandas()
+
+        ids = pd.Index(adjacency.focal.unique() if geoids is None else geoids)
+        # drop links to units outside the subset, keeping units left without
+        # neighbors as zero-weight self-loops (libpysal's isolate convention)
+        adjacency = adjacency[adjacency.neighbor.isin(ids)]
+        isolates = ids[~ids.isin(adjacency.focal)]
+        adjacency = pd.concat(
+            [
+                adjacency,
+                pd.DataFrame({"focal": isolates, "neighbor": isolates, "weight": 0.0}),
+            ]
+        )
+        adjacency = adjacency.iloc[
+            pd.Categorical(adjacency.focal, categories=ids).codes.argsort(kind="stable")
+        ]
+        return Graph.from_arrays(
+            adjacency.focal.to_numpy(),
+            adjacency.neighbor.to_numpy(),
+            adjacency.weight.to_numpy(),
+        )
+
     def bea_regions(self):
         """Return a table that maps states to their respective BEA regions
 
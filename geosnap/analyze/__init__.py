@@ -3,9 +3,19 @@ from .dynamics import (
     draw_sequence_from_gdf,
     predict_markov_labels,
     sequence,
+    simulate_ensemble,
     transition,
 )
-from .geodemo import ModelResults, cluster, find_k, find_region_k, regionalize
+from ._graphs import clear_graph_cache, set_graph_cache
+from .geodemo import (
+    ModelResults,
+    cluster,
+    cluster_many,
+    cluster_streaming,
+    find_k,
+    find_region_k,
+    regionalize,
+)
 from .incs import linc, lincs_from_gdf
 from .network import (
     isochrones_from_gdf,
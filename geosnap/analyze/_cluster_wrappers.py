@@ -3,6 +3,8 @@
 from warnings import warn
 
 import numpy as np
+from scipy.cluster.hierarchy import cut_tree
+from scipy.cluster.hierarchy import ward as ward_linkage
 from sklearn.cluster import (
     AffinityPropagation,
     AgglomerativeClustering,
@@ -312,6 +314,152 @@ def gaussian_mixture(
     return model
 
 
+def ward_path(X, ks, **kwargs):
+    """Ward clustering solutions for several values of k from a single dendrogram.
+
+    Parameters
+    ----------
+    X  : array-like
+        n x k attribute data
+    ks : list of int
+        numbers of clusters at which to cut the tree
+
+    Returns
+    -------
+    dict
+        cluster labels for each value in `ks`
+
+    """
+    ks = list(ks)
+    labels = cut_tree(ward_linkage(X), n_clusters=ks)
+    return {k: labels[:, i] for i, k in enumerate(ks)}
+
+
+def kmeans_path(X, ks, random_state=None, max_iter=300, tol=0.0001, **kwargs):
+    """K-Means solutions for increasing values of k, each warm-started from the last.
+
+    The smallest k is fit with the `kmeans` wrapper. Every subsequent solution
+    starts from the previous centroids plus the observation furthest from its
+    assigned centroid, so each fit typically converges in a handful of
+    iterations.
+
+    Parameters
+    ----------
+    X  : array-like
+        n x k attribute data
+    ks : list of int
+        increasing numbers of clusters to fit
+    random_state : int, RandomState instance or None, default=None
+        Pseudo-random number generator to control the starting state. Use an int for reproducible results across function calls.
+    max_iter : int, optional, default: 300
+        maximum number of iterations for each fit
+    tol : float, optional, default: 0.0001
+        convergence tolerance for each fit
+    kwargs
+        additional keyword arguments passed to the `kmeans` wrapper for the
+        smallest k and to the estimator for the others, where `init` and `n_init`
+        are replaced by the warm start. Above 12000 observations the estimator is
+        MiniBatchKMeans, so (like the `kmeans` wrapper) KMeans-only arguments such
+        as `algorithm` and `copy_x` are dropped there
+
+    Returns
+    -------
+    dict
+        cluster labels for each value in `ks`
+
+    """
+    ks = sorted(ks)
+    estimator = MiniBatchKMeans if X.shape[0] > 12000 else KMeans
+    model = kmeans(
+        X,
+        n_clusters=ks[0],
+        random_state=random_state,
+        max_iter=max_iter,
+        tol=tol,
+        **kwargs,
+    )
+    params = set(estimator().get_params()) - {"init", "n_init"}
+    kwargs = {key: value for key, value in kwargs.items() if key in params}
+    labels = {ks[0]: model.labels_}
+    for k in ks[1:]:
+        centers = model.cluster_centers_
+        dist = ((X - centers[model.labels_]) ** 2).sum(axis=1)
+        while len(centers) < k:
+            centers = np.vstack([centers, X[np.argmax(dist)]])
+            dist = np.minimum(dist, ((X - centers[-1]) ** 2).sum(axis=1))
+        model = estimator(
+            n_clusters=k,
+            init=centers,
+            n_init=1,
+            max_iter=max_iter,
+            tol=tol,
+            random_state=random_state,
+            **kwargs,
+        )
+        model.fit(X)
+        labels[k] = model.labels_
+    return labels
+
+
+def gaussian_mixture_path(
+    X, ks, covariance_type="full", random_state=None, **kwargs
+):
+    """Gaussian mixture solutions for increasing values of k, each warm-started from the last.
+
+    The smallest k is fit the same way as the `gaussian_mixture` wrapper. Every
+    subsequent model starts from the previous component means plus the
+    observation with the lowest likelihood under the previous model.
+
+    Parameters
+    ----------
+    X  : array-like
+        n x k attribute data
+    ks : list of int
+        increasing numbers of components to fit
+    covariance_type: str, optional, default: "full""
+        The covariance parameter passed to scikit-learn's GaussianMixture
+        algorithm
+    random_state : int, RandomState instance or None, default=None
+        Pseudo-random number generator to control the starting state. Use an int for reproducible results across function calls.
+    kwargs
+        additional keyword arguments passed to each GaussianMixture (e.g.
+        `reg_covar` or `n_init`), where `means_init` is replaced by the warm start
+
+    Returns
+    -------
+    dict
+        cluster labels for each value in `ks`
+
+    """
+    ks = sorted(ks)
+    model = GaussianMixture(
+        n_components=ks[0],
+        covariance_type=covariance_type,
+        random_state=random_state,
+        **kwargs,
+    )
+    model.fit(X)
+    kwargs = {key: value for key, value in kwargs.items() if key != "means_init"}
+    labels = {ks[0]: model.predict(X)}
+    for k in ks[1:]:
+        means = model.means_
+        score = model.score_samples(X)
+        while len(means) < k:
+            i = np.argmin(score)
+            means = np.vstack([means, X[i]])
+            score[i] = np.inf
+        model = GaussianMixture(
+            n_components=k,
+            means_init=means,
+            covariance_type=covariance_type,
+            random_state=random_state,
+            **kwargs,
+        )
+        model.fit(X)
+        labels[k] = model.predict(X)
+    return labels
+
+
 def hdbscan(X, min_cluster_size=5, gen_min_span_tree=True, **kwargs):
     """Clustering with Hierarchical DBSCAN.
 
@@ -0,0 +1,235 @@
+"""Cached construction of spatial graphs and weights."""
+
+import hashlib
+import pathlib
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import shapely
+from libpysal.graph import Graph, read_parquet
+from libpysal.weights import W
+from scipy.spatial import cKDTree
+
+# graphs and weights keyed by a hash of the units, their geometries, and the
+# graph specification, evicted least-recently-used first
+_GRAPHS = OrderedDict()
+_GRAPH_CACHE = {"maxsize": 32, "cache_dir": None}
+
+
+def set_graph_cache(maxsize=32, cache_dir=None):
+    """Configure the cache of spatial graphs shared by geosnap's spatial models.
+
+    Contiguity graphs and weights built by `regionalize`, `find_region_k`,
+    `transition`, and `predict_markov_labels` are cached by a hash of the unit
+    ids, their geometries, the type of graph, and the graph arguments, so
+    repeated analyses on the same geographic units (e.g. 2010 tracts) only
+    build each graph once. The weights used by regionalization models, whose
+    disconnected components (e.g. islands) are joined into one, are cached
+    alongside the graphs they were repaired from.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        maximum number of graphs held in memory. Least-recently used graphs are
+        dropped first. Set to 0 to disable the in-memory cache. By default 32
+    cache_dir : str or pathlib.Path, optional
+        if set, graphs are also stored in this directory as sparse adjacency
+        parquet files and read from it in later sessions. By default None
+    """
+    _GRAPH_CACHE["maxsize"] = maxsize
+    _GRAPH_CACHE["cache_dir"] = None if cache_dir is None else pathlib.Path(cache_dir)
+    while len(_GRAPHS) > maxsize:
+        _GRAPHS.popitem(last=False)
+
+
+def clear_graph_cache(disk=False):
+    """Empty the cache of spatial graphs.
+
+    Parameters
+    ----------
+    disk : bool, optional
+        if True, also remove the graphs stored in the on-disk cache directory,
+        by default False
+    """
+    _GRAPHS.clear()
+    cache_dir = _GRAPH_CACHE["cache_dir"]
+    if disk and cache_dir is not None and cache_dir.exists():
+        for path in cache_dir.glob("*.parquet"):
+            path.unlink()
+
+
+def subset_graph(graph, ids, index=None):
+    """Subset a precomputed graph (e.g. from `DataStore.adjacency`) to a set of units.
+
+    Parameters
+    ----------
+    graph : libpysal.graph.Graph
+        graph indexed by unit id (e.g. geoid)
+    ids : array-like
+        unique ids of the units to keep, in the order of the data
+    index : array-like, optional
+        if given, the nodes of the subset are relabeled with these values (e.g.
+        the positional index of a dataframe) in place of `ids`
+
+    Returns
+    -------
+    libpysal.graph.Graph
+        the graph restricted to `ids`
+    """
+    g = graph.subgraph(ids)
+    if index is None:
+        return g
+    labels = pd.Series(pd.Index(index), index=pd.Index(ids))
+    adjacency = g.adjacency.reset_index()
+    return Graph.from_arrays(
+        labels.loc[adjacency.focal].to_numpy(),
+        labels.loc[adjacency.neighbor].to_numpy(),
+        adjacency.weight.to_numpy(),
+    )
+
+
+def _graph_key(df, kind, kwargs, ids=None):
+    """Hash the index, geometries, unit ids, and specification of a graph."""
+    h = hashlib.sha1()
+    h.update(pd.util.hash_pandas_object(df.index).to_numpy().tobytes())
+    h.update(
+        pd.util.hash_pandas_object(pd.Series(df.geometry.to_wkb()), index=False)
+        .to_numpy()
+        .tobytes()
+    )
+    if ids is not None:
+        h.update(
+            pd.util.hash_pandas_object(pd.Series(ids), index=False)
+            .to_numpy()
+            .tobytes()
+        )
+    h.update(str(df.crs).encode())
+    h.update(kind.encode())
+    h.update(repr(sorted((kwargs or {}).items())).encode())
+    return h.hexdigest()
+
+
+def cached_graph(df, kind, kwargs, build, ids=None, weights=False):
+    """Return a cached graph for `df`, building (and caching) it if necessary.
+
+    Parameters
+    ----------
+    df : geopandas.GeoDataFrame
+        geodataframe whose index and geometries define the graph
+    kind : str
+        name of the graph type (e.g. "queen"), used in the cache key
+    kwargs : dict
+        arguments used to build the graph, used in the cache key
+    build : callable
+        function with no arguments that builds the graph
+    ids : array-like, optional
+        unit identifiers (e.g. geoids) included in the cache key
+    weights : bool, optional
+        whether `build` returns a `libpysal.weights.W` rather than a
+        `libpysal.graph.Graph`, by default False
+
+    Returns
+    -------
+    libpysal.graph.Graph or libpysal.weights.W
+        the graph returned by `build`, possibly from the cache
+    """
+    key = _graph_key(df, kind, kwargs, ids)
+    g = _cache_get(key, weights=weights)
+    if g is None:
+        g = build()
+        _cache_put(key, g, weights=weights)
+    return g
+
+
+def connected_weights(df, w, key=None):
+    """Join the disconnected components of `w` into a single component.
+
+    Each smaller component is linked to the largest component by a single join
+    between its unit and the unit of the largest component whose centroids are
+    closest, as in `spopt.region.base.form_single_component` with
+    linkage="single". All nearest links are found with a single KD-tree query
+    over the centroids of the largest component.
+
+    Parameters
+    ----------
+    df : geopandas.GeoDataFrame
+        geodataframe whose rows are in the order of `w`
+    w : libpysal.weights.W
+        weights to repair
+    key : str, optional
+        cache key of `w` (from `_graph_key`). If given, the repaired weights are
+        cached with it, so each set of geometries is only repaired once
+
+    Returns
+    -------
+    libpysal.weights.W
+        weights forming a single connected component
+    """
+    if key is not None:
+        key = f"{key}-connected"
+        w0 = _cache_get(key, weights=True)
+        if w0 is not None:
+            return w0
+    w0 = _join_components(df, w)
+    if key is not None:
+        _cache_put(key, w0, weights=True)
+    return w0
+
+
+def _join_components(df, w):
+    """Link every component of `w` to the largest by its closest pair of centroids."""
+    components = np.asarray(w.component_labels)
+    sizes = np.bincount(components)
+    if len(sizes) == 1:
+        return w
+    points = shapely.get_coordinates(df.geometry.centroid.values)
+    in_largest = components == np.argmax(sizes)
+    largest = np.flatnonzero(in_largest)
+    others = np.flatnonzero(~in_largest)
+    distances, nearest = cKDTree(points[largest]).query(points[others], k=1)
+
+    # closest unit of each small component (first in order if tied)
+    order = np.lexsort((distances, components[others]))
+    first = np.r_[True, np.diff(components[others][order]) != 0]
+    heads = others[order[first]]
+    tails = largest[nearest[order[first]]]
+
+    ids = w.id_order
+    neighbors = {focal: list(neighbors) for focal, neighbors in w.neighbors.items()}
+    for head, tail in zip(heads, tails, strict=True):
+        neighbors[ids[head]].append(ids[tail])
+        neighbors[ids[tail]].append(ids[head])
+    return W(neighbors, id_order=ids, silence_warnings=True)
+
+
+def _cache_get(key, weights=False):
+    """Look up a graph in memory, then on disk. Returns None if it is not cached."""
+    if key in _GRAPHS:
+        _GRAPHS.move_to_end(key)
+        return _GRAPHS[key]
+    cache_dir = _GRAPH_CACHE["cache_dir"]
+    if cache_dir is None or not (cache_dir / f"{key}.parquet").exists():
+        return None
+    g = read_parquet(cache_dir / f"{key}.parquet")
+    if weights:
+        g = g.to_W()
+    _remember(key, g)
+    return g
+
+
+def _cache_put(key, g, weights=False):
+    """Store a graph in memory and, if configured, on disk."""
+    cache_dir = _GRAPH_CACHE["cache_dir"]
+    if cache_dir is not None:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        (Graph.from_W(g) if weights else g).to_parquet(cache_dir / f"{key}.parquet")
+    _remember(key, g)
+
+
+def _remember(key, g):
+    """Add a graph to the in-memory cache, evicting the least-recently used."""
+    if _GRAPH_CACHE["maxsize"] > 0:
+        _GRAPHS[key] = g
+        while len(_GRAPHS) > _GRAPH_CACHE["maxsize"]:
+            _GRAPHS.popitem(last=False)
@@ -10,22 +10,104 @@ except ImportError:
             "backports.cached-property package. You can do so with `pip install "
             "backports.cached-property`."
         )
+import importlib
+import json
+import pathlib
 from warnings import warn
 
 import esda
 import geopandas as gpd
-from sklearn.metrics import (
-    calinski_harabasz_score,
-    davies_bouldin_score,
-    silhouette_samples,
-)
+import numpy as np
+import pandas as pd
+from libpysal.graph import Graph
+from libpysal.weights import WSP
+from scipy import sparse
+from sklearn.metrics import calinski_harabasz_score, davies_bouldin_score
+from sklearn.metrics.pairwise import euclidean_distances
 
 from ..visualize.mapping import plot_timeseries
 from ..visualize.skplt import plot_silhouette as _plot_silhouette
+from ._silhouettes import (
+    boundary_silhouette_samples,
+    path_silhouette_samples,
+    silhouette_samples_by,
+)
 from .dynamics import predict_markov_labels as _predict_markov_labels
 from .incs import lincs_from_gdf
 
 
+def _jsonable(value):
+    """Return `value` as a json-serializable scalar, or raise TypeError."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    raise TypeError
+
+
+def _estimator_state(estimator):
+    """Split an estimator into json-serializable metadata and numeric arrays.
+
+    Scalar attributes (including parameters) are stored as metadata and numeric
+    array attributes as arrays. Anything else (e.g. nested estimators or data
+    held by the instance) is dropped.
+    """
+    if estimator is None or isinstance(estimator, str):
+        return estimator, {}
+    metadata = {
+        "module": type(estimator).__module__,
+        "class": type(estimator).__qualname__,
+        "params": {},
+        "attributes": {},
+    }
+    if hasattr(estimator, "get_params"):
+        for key, value in estimator.get_params(deep=False).items():
+            try:
+                metadata["params"][key] = _jsonable(value)
+            except TypeError:
+                pass
+    arrays = dict()
+    for key, value in vars(estimator).items():
+        if isinstance(value, np.ndarray):
+            if value.dtype != object:
+                arrays[key] = value
+            continue
+        try:
+            metadata["attributes"][key] = _jsonable(value)
+        except TypeError:
+            pass
+    return metadata, arrays
+
+
+def _load_estimator(metadata, arrays):
+    """Rebuild an estimator from the output of `_estimator_state`."""
+    if metadata is None or isinstance(metadata, str):
+        return metadata
+    cls = getattr(importlib.import_module(metadata["module"]), metadata["class"])
+    if hasattr(cls, "get_params"):
+        estimator = cls(**metadata["params"])
+    else:
+        estimator = cls.__new__(cls)
+    estimator.__dict__.update(metadata["attributes"])
+    estimator.__dict__.update(arrays)
+    return estimator
+
+
+def _geometry_reference(source, datastore=None):
+    """Return a function that reads the geometries referenced by `source`."""
+
+    def read():
+        if str(source).endswith(".parquet"):
+            return gpd.read_parquet(source)
+        if datastore is None:
+            from .._data import DataStore
+
+            return getattr(DataStore(), source)()
+        return getattr(datastore, source)()
+
+    return read
+
+
 class ModelResults:
     """Storage for clustering and regionalization results.
 
@@ -50,6 +132,12 @@ class ModelResults:
     unit_index : str, optional
         which column on the long-form dataframe identifies the stable units
         over time. In a wide-form dataset, this would be the unique index
+    X : numpy.ndarray
+        (rescaled) feature matrix used to fit the model, with rows aligned to the
+        complete observations in `df`. Shared by all diagnostics
+    geometry : geopandas.GeoDataFrame, optional
+        long-form source of the unit geometries, joined onto `df` by
+        `temporal_index` and `unit_index` the first time `df` is accessed
     """
 
     def __init__(
@@ -64,6 +152,8 @@ class ModelResults:
         temporal_index,
         scaler,
         pooling,
+        X=None,
+        geometry=None,
     ):
         """Initialize a new ModelResults instance.
 
@@ -73,7 +163,7 @@ class ModelResults:
             data of the cluster
         columns: list-like
             columns used to compute model
-        W: libpysal.weights.W
+        W: libpysal.weights.W or libpysal.graph.Graph
             libpysal spatial weights matrix used in model
         labels: array-like
             labels of each column
@@ -81,10 +171,21 @@ class ModelResults:
             how many clusters model was computed with
         name: str
             name of the model
+        X: numpy.ndarray, optional
+            the feature matrix used to fit the model. If None, it will be
+            recomputed (once) from `df` using `scaler` and `pooling` when first needed
+        geometry: geopandas.GeoDataFrame, optional
+            if `df` holds only features and labels, a long-form geodataframe from
+            which geometries are joined lazily when diagnostics or maps need them
         """
         self.columns = columns
-        self.df = df
-        self.W = W
+        self._frame = df
+        self._geometry = geometry
+        self._restored = dict()
+        if geometry is None:
+            self.df = df
+        # diagnostics are computed with libpysal.weights.W objects
+        self.W = W.to_W() if isinstance(W, Graph) else W
         self.instance = instance
         self.labels = labels
         if self.W is None:
@@ -96,6 +197,171 @@ class ModelResults:
         self.temporal_index = temporal_index
         self.scaler = scaler
         self.pooling = pooling
+        if X is not None:
+            self.X = X
+
+    @cached_property
+    def df(self):
+        """Model data joined to the unit geometries.
+
+        Returns
+        -------
+        geopandas.GeoDataFrame
+            the features and labels used to estimate the model, with geometries
+            joined from the geometry source by time period and unit
+        """
+        geometry = self._geometry
+        if callable(geometry):
+            # a reference to the geometries that is resolved on first access
+            geometry = geometry()
+        keys = [self.temporal_index, self.unit_index]
+        if self.temporal_index not in geometry.columns:
+            # time-invariant geometries, e.g. a single census vintage
+            keys = [self.unit_index]
+        geoms = geometry[keys + [geometry.geometry.name]]
+        geoms = geoms[~geoms.duplicated(subset=keys)]
+        return gpd.GeoDataFrame(
+            self._frame.merge(geoms, on=keys, how="left"),
+            geometry=geometry.geometry.name,
+            crs=geometry.crs,
+        )
+
+    @cached_property
+    def X(self):
+        """Feature matrix used to fit the model.
+
+        Returns
+        -------
+        numpy.ndarray
+            (n, len(columns)) array with rows aligned to the complete observations
+            in `df`, rescaled the same way the data were scaled for fitting
+        """
+        df = self._frame.dropna(subset=self.columns)
+        if self.scaler and self.pooling in ["fixed", "unique"]:
+            # avoid a circular import with geodemo
+            from .geodemo import _scale_by_period
+
+            X = _scale_by_period(
+                df.set_index(self.temporal_index)[self.columns],
+                self.scaler,
+                self.scalers,
+            ).values
+        elif self.scaler and self.pooling == "pooled":
+            X = self.scaler.transform(df[self.columns].values)
+        else:
+            X = df[self.columns].values.astype(float)
+        # the rescalar can create nans if a column has no variance, so fill with 0
+        return np.nan_to_num(X)
+
+    @cached_property
+    def scalers(self):
+        """Scalers fitted to each time period of the model data.
+
+        Returns
+        -------
+        dict
+            fitted copies of `scaler` keyed by time period, holding the statistics
+            used to rescale the model data. Empty unless the data were rescaled
+            within each period ("fixed" or "unique" pooling)
+        """
+        if not self.scaler or self.pooling not in ["fixed", "unique"]:
+            return dict()
+        # avoid a circular import with geodemo
+        from .geodemo import _fit_by_period
+
+        df = self._frame.dropna(subset=self.columns)
+        return _fit_by_period(
+            df.set_index(self.temporal_index)[self.columns], self.scaler
+        )
+
+    @cached_property
+    def centroids(self):
+        """Mean of the (rescaled) features in each cluster.
+
+        Returns
+        -------
+        pandas.DataFrame
+            dataframe indexed by cluster label with one column per feature.
+            Observations labeled as noise (-1, e.g. by hdbscan) are not a cluster
+            and are excluded
+        """
+        df = self._frame.dropna(subset=self.columns)
+        labels = df[self.name].to_numpy()
+        clustered = labels != -1
+        labels, codes = np.unique(labels[clustered], return_inverse=True)
+        counts = np.bincount(codes, minlength=len(labels))
+        centroids = np.column_stack(
+            [
+                np.bincount(codes, weights=col, minlength=len(labels))
+                for col in self.X[clustered].T
+            ]
+        ) / counts[:, None]
+        return pd.DataFrame(centroids, index=labels, columns=self.columns)
+
+    def predict(self, gdf, new_colname=None):
+        """Assign new observations to the clusters of a fitted model.
+
+        The new data are rescaled with the statistics fitted to the model data, so
+        shifts in the new observations are preserved rather than scaled away. For
+        "fixed" or "unique" pooling, observations from a time period in the model
+        data use that period's fitted scaler (see `scalers`) and observations from
+        any other period use `scaler`, which is fit to all model periods at once.
+        For "pooled", the fitted scaler is applied. The observations are then
+        assigned to clusters by the fitted model if it supports prediction (e.g.
+        kmeans and gaussian mixture) or to the cluster with the nearest centroid
+        otherwise (e.g. ward).
+
+        Parameters
+        ----------
+        gdf : geopandas.GeoDataFrame
+            long-form (geo)dataframe holding the model columns for the new
+            observations, such as a new time period
+        new_colname : str, optional
+            column name to store predicted labels under. Defaults to the name of
+            the model
+
+        Returns
+        -------
+        geopandas.GeoDataFrame
+            copy of the input with predicted labels stored in the `new_colname`
+            column (NaN for observations with missing data)
+        """
+        assert (
+            self.model_type == "aspatial"
+        ), "prediction is only available for aspatial cluster models"
+        if new_colname is None:
+            new_colname = self.name
+        # align by position, since the index of `gdf` need not be unique
+        complete = gdf[self.columns].notna().all(axis=1).to_numpy()
+        data = gdf[self.columns].to_numpy(dtype=float)[complete]
+        if self.scaler and self.pooling in ["fixed", "unique"]:
+            # avoid a circular import with geodemo
+            from .geodemo import _scale_by_period
+
+            periods = gdf[self.temporal_index].to_numpy()[complete]
+            X = _scale_by_period(
+                pd.DataFrame(data, index=periods), self.scaler, self.scalers
+            ).values
+        elif self.scaler and self.pooling == "pooled":
+            X = self.scaler.transform(data)
+        else:
+            X = data
+        X = np.nan_to_num(X)
+
+        if hasattr(self.instance, "cluster_centers_") or hasattr(
+            self.instance, "means_"
+        ):
+            # centroid-based and mixture models can assign labels themselves
+            labels = self.instance.predict(X)
+        else:
+            centroids = self.centroids
+            nearest = euclidean_distances(X, centroids.values).argmin(axis=1)
+            labels = centroids.index.to_numpy()[nearest]
+
+        output = gdf.copy()
+        output[new_colname] = np.nan
+        output.loc[complete, new_colname] = labels
+        return output
 
     @cached_property
     def lincs(self):
@@ -110,8 +376,7 @@ class ModelResults:
         assert (
             self.model_type != "spatial"
         ), "The Local Index of Neighborhood Change (LINC) measure is only valid for models where labels are pooled across time periods"
-        df = self.df.copy()
-        df = df.dropna(subset=self.columns)
+        df = self.df.dropna(subset=self.columns)
         lincs = lincs_from_gdf(
             self.df,
             unit_index=self.unit_index,
@@ -121,9 +386,34 @@ class ModelResults:
         )
         return lincs
 
-    @cached_property
-    def silhouette_scores(self):
-        """Calculate silhouette scores for the each unit. See <https://scikit-learn.org/stable/modules/clustering.html#silhouette-coefficient> for more information
+    def compute_silhouette_scores(
+        self, estimator="exact", sample_size=10000, chunk_size=None, random_state=None
+    ):
+        """Calculate exact or approximate silhouette scores for each unit.
+
+        The exact silhouette requires all pairwise distances between observations,
+        which is infeasible for very large models, so several cheaper estimators
+        are available.
+
+        Parameters
+        ----------
+        estimator : str, optional
+            which estimator to use, by default "exact". Options include:
+
+            * exact : exact silhouette scores from scikit-learn
+            * blockwise : exact silhouette scores computed in row blocks so that
+              memory is bounded by `chunk_size`
+            * sampled : exact silhouette scores for a sample of `sample_size` units
+              stratified by cluster (NaN for units outside the sample)
+            * simplified : centroid-based silhouette, where distances to the
+              members of a cluster are replaced by the distance to its centroid
+        sample_size : int, optional
+            number of units to sample when estimator="sampled", by default 10000
+        chunk_size : int, optional
+            number of rows per block when estimator="blockwise". By default, blocks
+            hold roughly 256MB of distances
+        random_state : int, optional
+            seed for the sample drawn when estimator="sampled"
 
         Returns
         -------
@@ -131,27 +421,18 @@ class ModelResults:
             geodataframe with silhouette values available under the `silhouette_score` column
 
         """
-        df = self.df.copy()
-        df = df.dropna(subset=self.columns)
-        time_idx = self.temporal_index
-        if self.scaler:
-            if self.pooling in ["fixed", "unique"]:
-                # if fixed (or unique), scale within each time period
-                for time in df[time_idx].unique():
-                    df.loc[
-                        df[time_idx] == time, self.columns
-                    ] = self.scaler.fit_transform(
-                        df.loc[df[time_idx] == time, self.columns].values
-                    )
-
-            elif self.pooling == "pooled":
-                # if pooled, scale the whole series at once
-                df.loc[:, self.columns] = self.scaler.fit_transform(df.values)
+        df = self.df.dropna(subset=self.columns)
+        scores = silhouette_samples_by(
+            self.X,
+            df[self.name].values,
+            estimator=estimator,
+            sample_size=sample_size,
+            chunk_size=chunk_size,
+            random_state=random_state,
+        )
         return gpd.GeoDataFrame(
             {
-                "silhouette_score": silhouette_samples(
-                    df[self.columns].values, df[self.name]
-                ),
+                "silhouette_score": scores,
                 self.unit_index: df[self.unit_index],
                 self.temporal_index: df[self.temporal_index],
             },
@@ -160,6 +441,20 @@ class ModelResults:
             crs=self.df.crs,
         )
 
+    @cached_property
+    def silhouette_scores(self):
+        """Calculate silhouette scores for the each unit. See <https://scikit-learn.org/stable/modules/clustering.html#silhouette-coefficient> for more information
+
+        Returns
+        -------
+        geopandas.GeoDataFrame
+            geodataframe with silhouette values available under the `silhouette_score` column
+
+        """
+        if "silhouette_scores" in self._restored:
+            return self._from_restored("silhouette_scores")
+        return self.compute_silhouette_scores(estimator="exact")
+
     @property
     def silhouette_score(self):
         """Calculate Silhouette Score the cluster solution. See <https://scikit-learn.org/stable/modules/clustering.html#silhouette-coefficient> for more information
@@ -181,23 +476,8 @@ class ModelResults:
         float
 
         """
-        df = self.df.copy()
-        df = df.dropna(subset=self.columns)
-        time_idx = self.temporal_index
-        if self.scaler:
-            if self.pooling in ["fixed", "unique"]:
-                # if fixed (or unique), scale within each time period
-                for time in df[time_idx].unique():
-                    df.loc[
-                        df[time_idx] == time, self.columns
-                    ] = self.scaler.fit_transform(
-                        df.loc[df[time_idx] == time, self.columns].values
-                    )
-
-            elif self.pooling == "pooled":
-                # if pooled, scale the whole series at once
-                df.loc[:, self.columns] = self.scaler.fit_transform(df.values)
-        return calinski_harabasz_score(df[self.columns].values, df[self.name])
+        df = self._frame.dropna(subset=self.columns)
+        return calinski_harabasz_score(self.X, df[self.name])
 
     @cached_property
     def davies_bouldin_score(self):
@@ -208,23 +488,8 @@ class ModelResults:
         float
 
         """
-        df = self.df.copy()
-        df = df.dropna(subset=self.columns)
-        time_idx = self.temporal_index
-        if self.scaler:
-            if self.pooling in ["fixed", "unique"]:
-                # if fixed (or unique), scale within each time period
-                for time in df[time_idx].unique():
-                    df.loc[
-                        df[time_idx] == time, self.columns
-                    ] = self.scaler.fit_transform(
-                        df.loc[df[time_idx] == time, self.columns].values
-                    )
-
-            elif self.pooling == "pooled":
-                # if pooled, scale the whole series at once
-                df.loc[:, self.columns] = self.scaler.fit_transform(df.values)
-        return davies_bouldin_score(df[self.columns].values, df[self.name])
+        df = self._frame.dropna(subset=self.columns)
+        return davies_bouldin_score(self.X, df[self.name])
 
     @cached_property
     def nearest_label(self):
@@ -236,13 +501,12 @@ class ModelResults:
             geodataframe with next-best label assignments available under the `nearest_label` column
 
         """
-        df = self.df.copy()
-        df = df.dropna(subset=self.columns)
+        if "nearest_label" in self._restored:
+            return self._from_restored("nearest_label")
+        df = self.df.dropna(subset=self.columns)
         return gpd.GeoDataFrame(
             {
-                "nearest_label": esda.silhouettes.nearest_label(
-                    self.df[self.columns].values, self.labels
-                ),
+                "nearest_label": esda.silhouettes.nearest_label(self.X, self.labels),
                 self.unit_index: df[self.unit_index],
                 self.temporal_index: df[self.temporal_index],
             },
@@ -261,30 +525,17 @@ class ModelResults:
             geodataframe withboundary silhouette scores available under the `boundary_silhouette` column
 
         """
-        df = self.df.copy()
-        df = df.dropna(subset=self.columns)
+        if "boundary_silhouette" in self._restored:
+            return self._from_restored("boundary_silhouette")
+        df = self.df.dropna(subset=self.columns)
         assert self.model_type == "spatial", (
             "Model is aspatial (lacks a W object), but has been passed to a spatial diagnostic."
             " Try aspatial diagnostics like nearest_label() or sil_scores()"
         )
-        time_idx = self.temporal_index
-        if self.scaler:
-            if self.pooling in ["fixed", "unique"]:
-                # if fixed (or unique), scale within each time period
-                for time in df[time_idx].unique():
-                    df.loc[
-                        df[time_idx] == time, self.columns
-                    ] = self.scaler.fit_transform(
-                        df.loc[df[time_idx] == time, self.columns].values
-                    )
-
-            elif self.pooling == "pooled":
-                # if pooled, scale the whole series at once
-                df.loc[:, self.columns] = self.scaler.fit_transform(df.values)
         return gpd.GeoDataFrame(
             {
-                "boundary_silhouette": esda.boundary_silhouette(
-                    self.df[self.columns].values, self.labels, self.W
+                "boundary_silhouette": boundary_silhouette_samples(
+                    self.X, self.labels, self.W
                 ),
                 self.unit_index: df[self.unit_index],
                 self.temporal_index: df[self.temporal_index],
@@ -304,32 +555,19 @@ class ModelResults:
             geodataframe with path-silhouette scores available under the `path_silhouette` column
 
         """
-        df = self.df.copy()
-        df = df.dropna(subset=self.columns)
-        time_idx = self.temporal_index
-        if self.scaler:
-            if self.pooling in ["fixed", "unique"]:
-                # if fixed (or unique), scale within each time period
-                for time in df[time_idx].unique():
-                    df.loc[
-                        df[time_idx] == time, self.columns
-                    ] = self.scaler.fit_transform(
-                        df.loc[df[time_idx] == time, self.columns].values
-                    )
-
-            elif self.pooling == "pooled":
-                # if pooled, scale the whole series at once
-                df.loc[:, self.columns] = self.scaler.fit_transform(df.values)
+        if "path_silhouette" in self._restored:
+            return self._from_restored("path_silhouette")
+        df = self.df.dropna(subset=self.columns)
         assert self.model_type == "spatial", (
             "Model is aspatial(lacks a W object), but has been passed to a spatial diagnostic."
             " Try aspatial diagnostics like nearest_label() or sil_scores()"
         )
         return gpd.GeoDataFrame(
             {
-                "path_silhouette": esda.path_silhouette(
-                    self.df[self.columns].values, self.labels, self.W
+                "path_silhouette": path_silhouette_samples(
+                    self.X, self.labels, self.W
                 ),
-                self.unit_index: df[self.temporal_index],
+                self.unit_index: df[self.unit_index],
                 self.temporal_index: df[self.temporal_index],
             },
             index=self.df.index,
@@ -337,6 +575,168 @@ class ModelResults:
             crs=self.df.crs,
         )
 
+    def _from_restored(self, name):
+        """Attach geometries to a diagnostic table restored by `load`."""
+        return gpd.GeoDataFrame(
+            self._restored[name].set_index(self.df.index),
+            geometry=self.df.geometry,
+            crs=self.df.crs,
+        )
+
+    def save(self, path, geometry_source=None):
+        """Write the model to a compact on-disk format.
+
+        The model is stored as a directory holding the features and labels
+        (parquet), numeric arrays such as the feature matrix, the spatial weights
+        as a sparse adjacency matrix, and the fitted parameters of the scaler and
+        model (npz), any diagnostics that have already been computed (parquet),
+        and a small json file of metadata. Use `ModelResults.load` to read it.
+
+        Parameters
+        ----------
+        path : str or pathlib.Path
+            directory in which to store the model
+        geometry_source : str, optional
+            a reference to the unit geometries used instead of storing a copy.
+            Either the name of a `geosnap.DataStore` method that returns them
+            (e.g. "tracts_2010") or the path to a geoparquet file. If None
+            (default), the geometries are written to the directory as geoparquet
+        """
+        path = pathlib.Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        frame = self._frame
+        if isinstance(frame, gpd.GeoDataFrame):
+            frame = pd.DataFrame(frame.drop(columns=frame.geometry.name))
+        frame.reset_index(drop=True).to_parquet(path / "frame.parquet")
+
+        if geometry_source is None and (
+            self._geometry is not None or isinstance(self._frame, gpd.GeoDataFrame)
+        ):
+            keys = [self.temporal_index, self.unit_index]
+            self.df[keys + [self.df.geometry.name]].to_parquet(
+                path / "geometry.parquet"
+            )
+            geometry_source = "geometry.parquet"
+
+        arrays = {"labels": np.asarray(self.labels), "X": self.X}
+        if self.W is not None:
+            adjacency = self.W.sparse.tocsr()
+            arrays["W_data"] = adjacency.data
+            arrays["W_indices"] = adjacency.indices
+            arrays["W_indptr"] = adjacency.indptr
+            ids = np.asarray(self.W.id_order)
+            arrays["W_ids"] = ids.astype(str) if ids.dtype == object else ids
+        scaler, scaler_arrays = _estimator_state(self.scaler)
+        model, model_arrays = _estimator_state(self.instance)
+        arrays.update({f"scaler__{k}": v for k, v in scaler_arrays.items()})
+        arrays.update({f"model__{k}": v for k, v in model_arrays.items()})
+        np.savez_compressed(path / "arrays.npz", **arrays)
+
+        diagnostics = dict()
+        for name in [
+            "silhouette_scores",
+            "nearest_label",
+            "boundary_silhouette",
+            "path_silhouette",
+        ]:
+            if name in self.__dict__ or name in self._restored:
+                table = getattr(self, name)
+                pd.DataFrame(table.drop(columns=table.geometry.name)).reset_index(
+                    drop=True
+                ).to_parquet(path / f"{name}.parquet")
+        for name in ["calinski_harabasz_score", "davies_bouldin_score"]:
+            if name in self.__dict__:
+                diagnostics[name] = float(self.__dict__[name])
+
+        metadata = {
+            "columns": list(self.columns),
+            "name": self.name,
+            "unit_index": self.unit_index,
+            "temporal_index": self.temporal_index,
+            "pooling": self.pooling,
+            "scaler": scaler,
+            "model": model,
+            "geometry_source": geometry_source,
+            "diagnostics": diagnostics,
+        }
+        with open(path / "metadata.json", "w") as f:
+            json.dump(metadata, f)
+
+    @classmethod
+    def load(cls, path, datastore=None):
+        """Read a model written by `ModelResults.save`.
+
+        Geometries are not read until they are first needed by a diagnostic or
+        plot.
+
+        Parameters
+        ----------
+        path : str or pathlib.Path
+            directory in which the model is stored
+        datastore : geosnap.DataStore, optional
+            datastore used to resolve a geometry reference to a DataStore method.
+            If None, a default DataStore is created when the geometries are needed
+
+        Returns
+        -------
+        ModelResults
+            the stored model
+        """
+        path = pathlib.Path(path)
+        with open(path / "metadata.json") as f:
+            metadata = json.load(f)
+        arrays = dict(np.load(path / "arrays.npz"))
+        frame = pd.read_parquet(path / "frame.parquet")
+
+        W = None
+        if "W_data" in arrays:
+            n = len(arrays["W_ids"])
+            adjacency = sparse.csr_matrix(
+                (arrays["W_data"], arrays["W_indices"], arrays["W_indptr"]),
+                shape=(n, n),
+            )
+            W = WSP(adjacency, id_order=arrays["W_ids"].tolist()).to_W(
+                silence_warnings=True
+            )
+
+        def _subset(prefix):
+            return {
+                k[len(prefix) :]: v for k, v in arrays.items() if k.startswith(prefix)
+            }
+
+        geometry = None
+        source = metadata["geometry_source"]
+        if source == "geometry.parquet":
+            source = path / source
+        if source is not None:
+            geometry = _geometry_reference(source, datastore)
+
+        results = cls(
+            df=frame,
+            columns=metadata["columns"],
+            labels=arrays["labels"],
+            instance=_load_estimator(metadata["model"], _subset("model__")),
+            W=W,
+            name=metadata["name"],
+            unit_index=metadata["unit_index"],
+            temporal_index=metadata["temporal_index"],
+            scaler=_load_estimator(metadata["scaler"], _subset("scaler__")),
+            pooling=metadata["pooling"],
+            X=arrays["X"],
+            geometry=geometry,
+        )
+        for name, value in metadata["diagnostics"].items():
+            setattr(results, name, value)
+        for name in [
+            "silhouette_scores",
+            "nearest_label",
+            "boundary_silhouette",
+            "path_silhouette",
+        ]:
+            if (path / f"{name}.parquet").exists():
+                results._restored[name] = pd.read_parquet(path / f"{name}.parquet")
+        return results
+
     def plot_silhouette(self, metric="euclidean", title="Silhouette Score"):
         """Create a diagnostic plot of silhouette scores using scikit-plot.
 
@@ -354,24 +754,7 @@ class ModelResults:
             silhouette plot created by scikit-plot.
 
         """
-        df = self.df.copy()
-        time_idx = self.temporal_index
-        if self.scaler:
-            if self.pooling in ["fixed", "unique"]:
-                # if fixed (or unique), scale within each time period
-                for time in df[time_idx].unique():
-                    df.loc[
-                        df[time_idx] == time, self.columns
-                    ] = self.scaler.fit_transform(
-                        df.loc[df[time_idx] == time, self.columns].values
-                    )
-
-            elif self.pooling == "pooled":
-                # if pooled, scale the whole series at once
-                df.loc[:, self.columns] = self.scaler.fit_transform(df.values)
-        fig = _plot_silhouette(
-            df[self.columns].values, self.labels, metric=metric, title=title
-        )
+        fig = _plot_silhouette(self.X, self.labels, metric=metric, title=title)
 
         return fig
 
@@ -746,6 +1129,7 @@ class ModelResults:
         increment=None,
         seed=None,
         verbose=True,
+        wide=False,
     ):
         """Predict neighborhood labels from the model in future time periods using a spatial Markov transition model
 
@@ -766,6 +1150,9 @@ class ModelResults:
             styled increment each time-step referrs to. For example, for a model fitted to decadal
             Census data, each time-step refers to a period of ten years, so an increment of 10 ensures
             that the temporal index aligns appropriately with the time steps being simulated
+        wide : bool, optional
+            if True, return a (units x time-steps) dataframe of predicted labels
+            instead of a long-form geodataframe. By default False
 
         Returns
         -------
@@ -790,5 +1177,6 @@ class ModelResults:
             increment=increment,
             verbose=verbose,
             seed=seed,
+            wide=wide,
         )
         return output
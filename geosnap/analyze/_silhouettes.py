@@ -0,0 +1,335 @@
+"""Exact and approximate silhouette estimators for large cluster solutions."""
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
+from sklearn.metrics import silhouette_samples
+from sklearn.metrics.pairwise import euclidean_distances
+
+
+def _encode(labels):
+    """Integer-encode a label vector, returning the codes and the class sizes."""
+    _, codes = np.unique(np.asarray(labels), return_inverse=True)
+    return codes, np.bincount(codes)
+
+
+def _silhouette_from_ab(a, b, own_counts):
+    """Combine within- and nearest-cluster distances into silhouette values."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        s = (b - a) / np.maximum(a, b)
+    # by convention the silhouette of a unit in a singleton cluster is 0
+    s[own_counts == 1] = 0
+    return np.nan_to_num(s)
+
+
+def blockwise_silhouette_samples(X, labels, chunk_size=None):
+    """Exact silhouette values computed over row blocks with bounded memory.
+
+    Distances from a block of rows to every observation are reduced to per-cluster
+    sums with a single matrix product, so peak memory is (chunk_size x n) rather
+    than (n x n).
+
+    Parameters
+    ----------
+    X : numpy.ndarray
+        (n, k) feature matrix
+    labels : array-like
+        cluster label for each row of `X`
+    chunk_size : int, optional
+        number of rows per block. By default, blocks are sized to hold roughly
+        256MB of distances
+
+    Returns
+    -------
+    numpy.ndarray
+        silhouette value for each row of `X`
+    """
+    X = np.asarray(X, dtype=float)
+    return _blockwise_silhouette(
+        lambda rows: euclidean_distances(X[rows], X), labels, chunk_size
+    )
+
+
+def _blockwise_silhouette(distances, labels, chunk_size=None):
+    """Silhouette values from distances computed for one block of rows at a time.
+
+    Parameters
+    ----------
+    distances : callable
+        function mapping an array of row positions to the (len(rows), n) matrix
+        of distances from those rows to every observation
+    labels : array-like
+        cluster label for each observation
+    chunk_size : int, optional
+        number of rows per block. By default, blocks are sized to hold roughly
+        256MB of distances
+
+    Returns
+    -------
+    numpy.ndarray
+        silhouette value for each observation
+    """
+    codes, counts = _encode(labels)
+    n = len(codes)
+    if chunk_size is None:
+        chunk_size = max(1, int(2**28 / (8 * n)))
+    onehot = sparse.csr_matrix((np.ones(n), (np.arange(n), codes)))
+
+    a = np.empty(n)
+    b = np.empty(n)
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        rows = np.arange(stop - start)
+        own = codes[start:stop]
+        sums = np.asarray(onehot.T.dot(distances(np.arange(start, stop)).T).T)
+        a[start:stop] = sums[rows, own] / np.maximum(counts[own] - 1, 1)
+        sums[rows, own] = np.inf
+        b[start:stop] = (sums / counts).min(axis=1)
+
+    return _silhouette_from_ab(a, b, counts[codes])
+
+
+def sampled_silhouette_samples(X, labels, sample_size=10000, random_state=None):
+    """Silhouette values for a sample of observations stratified by cluster.
+
+    Each cluster contributes to the sample in proportion to its size (and at
+    least one observation), and the silhouette of each sampled unit is computed
+    exactly with respect to the other sampled units.
+
+    Parameters
+    ----------
+    X : numpy.ndarray
+        (n, k) feature matrix
+    labels : array-like
+        cluster label for each row of `X`
+    sample_size : int, optional
+        approximate number of observations to sample, by default 10000
+    random_state : int, optional
+        seed for the random sample
+
+    Returns
+    -------
+    numpy.ndarray
+        silhouette value for each sampled row of `X` and NaN for the others
+    """
+    X = np.asarray(X, dtype=float)
+    codes, counts = _encode(labels)
+    n = X.shape[0]
+    if sample_size >= n:
+        return blockwise_silhouette_samples(X, labels)
+    rng = np.random.default_rng(random_state)
+    sizes = np.minimum(np.maximum(np.round(sample_size * counts / n), 1), counts)
+    sample = np.concatenate(
+        [
+            rng.choice(np.flatnonzero(codes == code), size=int(size), replace=False)
+            for code, size in enumerate(sizes)
+        ]
+    )
+    s = np.full(n, np.nan)
+    s[sample] = blockwise_silhouette_samples(X[sample], codes[sample])
+    return s
+
+
+def simplified_silhouette_samples(X, labels):
+    """Centroid-based (simplified) silhouette values.
+
+    The mean distance to the members of a cluster is replaced by the distance to
+    the cluster centroid, so the cost is O(n x n_clusters) instead of O(n^2).
+
+    Parameters
+    ----------
+    X : numpy.ndarray
+        (n, k) feature matrix
+    labels : array-like
+        cluster label for each row of `X`
+
+    Returns
+    -------
+    numpy.ndarray
+        simplified silhouette value for each row of `X`
+    """
+    X = np.asarray(X, dtype=float)
+    codes, counts = _encode(labels)
+    centroids = np.column_stack(
+        [np.bincount(codes, weights=col) for col in X.T]
+    ) / counts[:, None]
+    dist = euclidean_distances(X, centroids)
+    rows = np.arange(X.shape[0])
+    a = dist[rows, codes]
+    dist[rows, codes] = np.inf
+    b = dist.min(axis=1)
+    return _silhouette_from_ab(a, b, counts[codes])
+
+
+def _neighbor_pairs(W):
+    """Positions of the (focal, neighbor) pairs in the sparse adjacency of `W`."""
+    adjacency = sparse.coo_matrix(W.sparse)
+    # drop the zero-weight self-loops some graphs use to encode isolates
+    keep = (adjacency.row != adjacency.col) & (adjacency.data != 0)
+    return adjacency.row[keep], adjacency.col[keep]
+
+
+def _edge_distances(X, W):
+    """Sparse matrix of feature distances between neighboring observations.
+
+    Zero distances between distinct neighbors are kept as explicit entries so that
+    they remain edges of the graph.
+    """
+    i, j = _neighbor_pairs(W)
+    d = np.sqrt(((X[i] - X[j]) ** 2).sum(axis=1))
+    n = X.shape[0]
+    return sparse.csr_matrix((d, (i, j)), shape=(n, n))
+
+
+def boundary_silhouette_samples(X, labels, W):
+    """Boundary silhouette values computed from the sparse adjacency of `W`.
+
+    Equivalent to `esda.boundary_silhouette` with euclidean distances, but only the
+    distances from boundary observations to the members of their own and
+    neighboring regions are computed, one region at a time.
+
+    Parameters
+    ----------
+    X : numpy.ndarray
+        (n, k) feature matrix
+    labels : array-like
+        region label for each row of `X`
+    W : libpysal.weights.W or libpysal.graph.Graph
+        spatial weights with observations in the same order as the rows of `X`
+
+    Returns
+    -------
+    numpy.ndarray
+        boundary silhouette value for each row of `X` (0 for observations that
+        do not border another region, and for singleton regions)
+    """
+    X = np.asarray(X, dtype=float)
+    codes, counts = _encode(labels)
+    n = X.shape[0]
+    focal, neighbor = _neighbor_pairs(W)
+    cross = codes[focal] != codes[neighbor]
+    # (observation, candidate region) pairs: each boundary observation against
+    # its own region and every region it borders
+    pairs = np.unique(
+        np.column_stack([focal[cross], codes[neighbor[cross]]]), axis=0
+    )
+    boundary = np.unique(pairs[:, 0])
+    boundary = boundary[counts[codes[boundary]] > 1]
+    pairs = pairs[np.isin(pairs[:, 0], boundary)]
+    own = np.column_stack([boundary, codes[boundary]])
+
+    # sum of distances from each pair's observation to the members of its region
+    candidates = np.vstack([own, pairs])
+    sums = np.empty(len(candidates))
+    order = np.argsort(candidates[:, 1], kind="stable")
+    splits = np.flatnonzero(np.diff(candidates[order, 1])) + 1
+    for block in np.split(order, splits):
+        members = np.flatnonzero(codes == candidates[block[0], 1])
+        sums[block] = euclidean_distances(X[candidates[block, 0]], X[members]).sum(
+            axis=1
+        )
+
+    s = np.zeros(n)
+    if len(boundary) == 0:
+        return s
+    a = sums[: len(own)] / (counts[own[:, 1]] - 1)
+    b = np.full(n, np.inf)
+    np.minimum.at(b, pairs[:, 0], sums[len(own) :] / counts[pairs[:, 1]])
+    b = b[boundary]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        s[boundary] = np.nan_to_num((b - a) / np.maximum(a, b))
+    return s
+
+
+def path_silhouette_samples(X, labels, W, chunk_size=None):
+    """Path silhouette values computed from the sparse adjacency of `W`.
+
+    Equivalent to `esda.path_silhouette` with euclidean distances: the
+    dissimilarity between two observations is the length of the shortest path
+    between them over the spatial graph, where each edge is weighted by the
+    feature distance between its endpoints. Feature distances are only computed
+    along the edges of the graph, and shortest paths are computed for a block of
+    sources at a time and reduced to per-region sums, so memory is bounded by
+    `chunk_size` rather than growing with the square of the number of
+    observations.
+
+    Parameters
+    ----------
+    X : numpy.ndarray
+        (n, k) feature matrix
+    labels : array-like
+        region label for each row of `X`
+    W : libpysal.weights.W or libpysal.graph.Graph
+        spatial weights with observations in the same order as the rows of `X`
+    chunk_size : int, optional
+        number of source observations per block. By default, blocks are sized to
+        hold roughly 256MB of path lengths
+
+    Returns
+    -------
+    numpy.ndarray
+        path silhouette value for each row of `X`
+    """
+    X = np.asarray(X, dtype=float)
+    labels = np.asarray(labels)
+    graph = _edge_distances(X, W)
+    n_components, components = csgraph.connected_components(graph, directed=False)
+
+    s = np.zeros(X.shape[0])
+    for component in range(n_components):
+        members = np.flatnonzero(components == component)
+        n_labels = len(np.unique(labels[members]))
+        if n_components > 1 and not (2 < n_labels < len(members) - 1):
+            # follows esda: degenerate components get a path silhouette of 0
+            continue
+        if n_labels < 2:
+            continue
+        subgraph = graph[members][:, members]
+        s[members] = _blockwise_silhouette(
+            lambda rows, subgraph=subgraph: csgraph.dijkstra(
+                subgraph, directed=False, indices=rows
+            ),
+            labels[members],
+            chunk_size,
+        )
+    return s
+
+
+def silhouette_samples_by(
+    X, labels, estimator="exact", sample_size=10000, chunk_size=None, random_state=None
+):
+    """Compute silhouette values with one of the available estimators.
+
+    Parameters
+    ----------
+    X : numpy.ndarray
+        (n, k) feature matrix
+    labels : array-like
+        cluster label for each row of `X`
+    estimator : str, optional
+        one of "exact", "blockwise", "sampled", or "simplified", by default "exact"
+    sample_size : int, optional
+        number of units to sample when estimator="sampled", by default 10000
+    chunk_size : int, optional
+        number of rows per block when estimator="blockwise"
+    random_state : int, optional
+        seed for the sample drawn when estimator="sampled"
+
+    Returns
+    -------
+    numpy.ndarray
+        silhouette value for each row of `X`
+    """
+    if estimator == "exact":
+        return silhouette_samples(X, labels)
+    if estimator == "blockwise":
+        return blockwise_silhouette_samples(X, labels, chunk_size=chunk_size)
+    if estimator == "sampled":
+        return sampled_silhouette_samples(
+            X, labels, sample_size=sample_size, random_state=random_state
+        )
+    if estimator == "simplified":
+        return simplified_silhouette_samples(X, labels)
+    raise ValueError(
+        "`estimator` must be one of ['exact', 'blockwise', 'sampled', 'simplified']"
+    )
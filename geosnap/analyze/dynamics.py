@@ -8,17 +8,32 @@ import numpy as np
 import pandas as pd
 from giddy.markov import Markov, Spatial_Markov
 from giddy.sequence import Sequence
+from joblib import Parallel, delayed, effective_n_jobs
 from libpysal.graph import Graph
-from libpysal.weights import lag_categorical
 from numpy.random import PCG64, SeedSequence, default_rng
+from scipy import sparse
 from sklearn.cluster import AgglomerativeClustering
 from tqdm.auto import tqdm
 
+from .._data import _Map
+from ._graphs import cached_graph, subset_graph
 
-def _get_g(df, gname, g_kwargs):
+
+def _get_g(df, gname, g_kwargs, ids=None):
+    if isinstance(gname, Graph):
+        # a precomputed graph indexed by unit id, e.g. from DataStore.adjacency
+        if ids is None:
+            return subset_graph(gname, df.index)
+        return subset_graph(gname, ids, index=df.index)
     if g_kwargs is None:
         g_kwargs = {}
     gname = gname.lower()
+    return cached_graph(
+        df, gname, g_kwargs, lambda: _build_g(df, gname, g_kwargs)
+    )
+
+
+def _build_g(df, gname, g_kwargs):
     if gname in ["rook", "queen"]:
         rook = gname != "queen"
         g = Graph.build_contiguity(df, rook=rook, **g_kwargs)
@@ -68,9 +83,10 @@ def transition(
     unit_index : string, optional
         Column identifying the unique id of spatial units.
         Default is "geoid".
-    w_type : string, optional
+    w_type : string or libpysal.graph.Graph, optional
         Type of spatial weights type ("rook", "queen", "knn" or
-        "kernel") to be used for spatial structure. Default is
+        "kernel") to be used for spatial structure, or a precomputed graph
+        indexed by `unit_index` (e.g. from `DataStore.adjacency`). Default is
         None, if non-spatial Markov transition rates are desired.
     w_options : dict
         additional options passed to a libpysal weights constructor
@@ -83,7 +99,8 @@ def transition(
     --------
     mar : giddy.markov.Markov instance or giddy.markov.Spatial_Markov
         if w_type=None, a classic Markov instance is returned.
-        if w_type is given, a Spatial_Markov instance is returned.
+        if w_type is given, a DiscreteSpatialMarkov instance (a Spatial_Markov
+        estimated directly on the sparse graph) is returned.
 
     Examples
     --------
@@ -126,8 +143,7 @@ def transition(
     assert unit_index in gdf.columns, (
         f"The unit_index ({unit_index}) column is not in the geodataframe"
     )
-    gdf_temp = gdf.copy().reset_index()
-    df = gdf_temp[[unit_index, temporal_index, cluster_col]]
+    df = gdf.reset_index()[[unit_index, temporal_index, cluster_col]]
     df_wide = df.pivot(
         index=unit_index, columns=temporal_index, values=cluster_col
     ).dropna()
@@ -135,15 +151,133 @@ def transition(
     if w_type is None:
         mar = Markov(y)  # class markov modeling
     else:
-        geoms = gdf_temp.groupby(unit_index).first()[gdf_temp.geometry.name]
-        gdf_wide = df_wide.merge(geoms, left_index=True, right_index=True)
-        w = _get_g(gpd.GeoDataFrame(gdf_wide), gname=w_type, g_kwargs=w_options)
-        mar = Spatial_Markov(
-            y, w.to_W(), permutations=permutations, discrete=True, variable_name=cluster_col
+        geoms = gdf.drop_duplicates(subset=[unit_index]).set_index(unit_index).geometry
+        gdf_wide = gpd.GeoDataFrame(
+            df_wide, geometry=geoms.reindex(df_wide.index).values, crs=gdf.crs
+        )
+        w = _get_g(gdf_wide, gname=w_type, g_kwargs=w_options)
+        mar = DiscreteSpatialMarkov(
+            y, w, permutations=permutations, variable_name=cluster_col
         )
     return mar
 
 
+class DiscreteSpatialMarkov(Spatial_Markov):
+    """Spatial Markov model for discrete labels estimated on a sparse graph.
+
+    A drop-in replacement for `giddy.markov.Spatial_Markov` with `discrete=True`:
+    the spatial lag of every period is computed with one sparse product against
+    the adjacency matrix (with libpysal's "tryself" tie-breaking), and all (lag,
+    origin, destination) transitions are counted with a single `numpy.bincount`,
+    so weights never need to be converted to a `libpysal.weights.W`. Permutation
+    inference on the chi-squared test of spatial dependence shuffles the label
+    sequences across units, computing lags and transition counts for batches of
+    permutations at once.
+
+    Parameters
+    ----------
+    y : array-like
+        (n, t) array of class labels for n units over t periods
+    w : libpysal.graph.Graph or libpysal.weights.W
+        spatial weights with units in the order of the rows of `y`
+    permutations : int, optional
+        number of random permutations used to compute `x2_rpvalue`, by default 0
+    variable_name : str, optional
+        name of the labels, used in the summary
+
+    Attributes
+    ----------
+    classes : numpy.ndarray
+        unique class labels
+    T : numpy.ndarray
+        (k, k, k) transition counts conditioned on the lag class
+    P : numpy.ndarray
+        (k, k, k) transition probabilities conditioned on the lag class
+    transitions : numpy.ndarray
+        (k, k) aspatial transition counts
+    p : numpy.ndarray
+        (k, k) aspatial transition probabilities
+    x2_realizations : numpy.ndarray
+        (permutations, 1) chi-squared statistics under random permutations
+    x2_rpvalue : float
+        pseudo p-value of the chi-squared statistic from the permutations
+    """
+
+    def __init__(self, y, w, permutations=0, variable_name=None, max_cells=2**25):
+        y = np.asarray(y)
+        self.fixed = True
+        self.discrete = True
+        self.cutoffs = None
+        self.lag_cutoffs = None
+        self.variable_name = variable_name
+
+        self.classes, codes = np.unique(y, return_inverse=True)
+        self.class_ids = codes.reshape(y.shape)
+        self.k = self.m = len(self.classes)
+        adjacency = sparse.csr_matrix(w.sparse)
+
+        self.lclass_ids = _categorical_lag(
+            adjacency, self.class_ids.T, self.k, random_ties=True
+        ).T
+        self.T = self._count(self.class_ids[None], self.lclass_ids[None])[0]
+        self.transitions = self.T.sum(axis=0)
+        self.p = _row_normalize(self.transitions)
+        self.P = _row_normalize(self.T)
+
+        if permutations:
+            n, t = y.shape
+            batch_size = max(1, max_cells // (n * t * self.k))
+            x2_realizations = []
+            for start in range(0, permutations, batch_size):
+                size = min(batch_size, permutations - start)
+                # shuffle each unit's label sequence to a random location
+                permuted = self.class_ids[
+                    np.stack([np.random.permutation(n) for _ in range(size)])
+                ]
+                lags = _categorical_lag(
+                    adjacency,
+                    permuted.transpose(0, 2, 1).reshape(size * t, n),
+                    self.k,
+                    random_ties=True,
+                )
+                lags = lags.reshape(size, t, n).transpose(0, 2, 1)
+                x2_realizations.append(
+                    self._x2_statistics(self._count(permuted, lags))
+                )
+            self.x2_realizations = np.concatenate(x2_realizations)[:, None]
+            self.x2_rpvalue = ((self.x2_realizations >= self.x2).sum() + 1.0) / (
+                permutations + 1.0
+            )
+
+    def _count(self, class_ids, lclass_ids):
+        """Count (lag, origin, destination) transitions for a batch of (n, t) panels."""
+        k = self.k
+        batch = np.arange(len(class_ids))[:, None, None]
+        triples = (
+            (batch * k + lclass_ids[:, :, :-1]) * k + class_ids[:, :, :-1]
+        ) * k + class_ids[:, :, 1:]
+        counts = np.bincount(triples.ravel(), minlength=len(class_ids) * k**3)
+        return counts.reshape(len(class_ids), k, k, k).astype(float)
+
+    def _x2_statistics(self, T):
+        """Chi-squared statistics (summed over lag classes) for a batch of counts.
+
+        Vectorized form of `giddy.markov.chi2` comparing each conditional matrix
+        with the aspatial transitions.
+        """
+        p = _row_normalize(self.transitions)
+        expected = T.sum(axis=-1, keepdims=True) * p
+        squared = (T - expected) ** 2
+        expected = expected + (expected == 0)
+        return (squared / expected).sum(axis=(1, 2, 3))
+
+
+def _row_normalize(counts):
+    """Convert transition counts to probabilities, leaving empty rows at zero."""
+    totals = counts.sum(axis=-1, keepdims=True)
+    return counts / (totals + (totals == 0))
+
+
 def sequence(
     gdf,
     cluster_col,
@@ -260,6 +394,7 @@ def predict_markov_labels(
     increment=None,
     seed=None,
     verbose=True,
+    wide=False,
 ):
     """Predict neighborhood labels based on spatial Markov transition model
 
@@ -273,8 +408,10 @@ def predict_markov_labels(
         column on dataframe that identifies unique time periods, by default "year"
     cluster_col : str
         column on the dataframe that stores cluster or other labels to be simulated
-    w_type : str, optional
-        type of spatial weights matrix to include in the transition model, by default "queen"
+    w_type : str or libpysal.graph.Graph, optional
+        type of spatial weights matrix to include in the transition model, or a
+        precomputed graph indexed by `unit_index` (e.g. from `DataStore.adjacency`),
+        by default "queen"
     w_options : dict, optional
         additional keyword arguments passed to the libpysal weights constructor
     base_year : int or str, optional
@@ -290,13 +427,16 @@ def predict_markov_labels(
         that the temporal index aligns appropriately with the time steps being simulated
     verbose: bool
         if true, print warnings from the label sampling process
+    wide : bool, optional
+        if True, return a (units x time-steps) dataframe of predicted labels indexed
+        by `unit_index`, with one column per simulated time period, instead of a
+        long-form geodataframe. By default False
 
     Returns
     -------
     geopandas.GeoDataFrame
         long-form geodataframe with predicted cluster labels stored in the `new_colname` column
     """
-    crs = gdf.crs
     np.random.seed(seed)
     if not new_colname:
         new_colname = "predicted"
@@ -325,97 +465,141 @@ def predict_markov_labels(
         w_options=w_options,
     )
 
+    if time_steps > 1:
+        assert increment, (
+            "You must set the `increment` argument to simulate multiple time steps"
+        )
+    base = gdf[gdf[temporal_index] == base_year].reset_index(drop=True)
+    w = _get_g(
+        gpd.GeoDataFrame(base),
+        gname=w_type,
+        g_kwargs=w_options,
+        ids=base[unit_index],
+    )
+    adjacency = sparse.csr_matrix(w.sparse)
+    units = base[unit_index].values
+
+    # simulate on label arrays; each step uses the last known set of labels to get
+    # the spatial context for each geog unit
+    labels = [base[cluster_col].values]
+    for _ in range(time_steps):
+        labels.append(_draw_labels(adjacency, labels[-1], t, units, verbose))
+
+    if wide:
+        if increment:
+            times = [base_year + (increment * step) for step in range(1, time_steps + 1)]
+        else:
+            times = list(range(1, time_steps + 1))
+        return pd.DataFrame(
+            np.column_stack(labels[1:]),
+            index=pd.Index(units, name=unit_index),
+            columns=pd.Index(times, name=temporal_index),
+        )
     if time_steps == 1:
-        gdf = gdf[gdf[temporal_index] == base_year].reset_index(drop=True)
-        w = _get_g(gpd.GeoDataFrame(gdf), gname=w_type, g_kwargs=w_options)
+        return gpd.GeoDataFrame(
+            {
+                new_colname: labels[1],
+                unit_index: units,
+                base.geometry.name: base.geometry.values,
+            },
+            geometry=base.geometry.name,
+        )
 
-        predicted = _draw_labels(w, gdf, cluster_col, t, unit_index, verbose)
-        if new_colname:
-            predicted = predicted.rename(columns={cluster_col: new_colname})
-        return predicted
+    # attach the geometries once, for every period at the same time
+    n = len(base)
+    positions = np.tile(np.arange(n), time_steps + 1)
+    return gpd.GeoDataFrame(
+        {
+            unit_index: units[positions],
+            new_colname: np.concatenate(labels),
+            temporal_index: np.repeat(
+                [base_year + (increment * step) for step in range(time_steps + 1)], n
+            ),
+            base.geometry.name: base.geometry.values[positions],
+        },
+        index=base.index[positions],
+        geometry=base.geometry.name,
+    )
 
-    else:
-        assert increment, (
-            "You must set the `increment` argument to simulate multiple time steps"
+
+def _class_codes(classes, labels):
+    """Return the position of each label in `classes`, raising on unknown labels."""
+    codes = classes.get_indexer(labels)
+    unknown = codes < 0
+    if unknown.any():
+        raise ValueError(
+            f"labels {pd.unique(np.asarray(labels)[unknown]).tolist()} are not "
+            f"classes of the transition model {classes.tolist()}"
         )
-        predictions = []
-        gdf = gdf[gdf[temporal_index] == base_year]
-        gdf = gdf[[unit_index, cluster_col, temporal_index, gdf.geometry.name]]
-        current_time = base_year + increment
-        gdf = gdf.dropna(subset=[cluster_col]).reset_index(drop=True)
-        w = _get_g(gpd.GeoDataFrame(gdf), gname=w_type, g_kwargs=w_options)
-        predictions.append(gdf)
-
-        for step in range(1, time_steps + 1):
-            # use the last known set of labels  to get the spatial context for each geog unit
-            gdf = predictions[step - 1].copy()
-
-            predicted = _draw_labels(w, gdf, cluster_col, t, unit_index, verbose)
-            predicted[temporal_index] = current_time
-            predictions.append(predicted)
-            current_time += increment
-        gdf = gpd.GeoDataFrame(pd.concat(predictions), crs=crs)
-        if new_colname:
-            gdf = gdf.rename(columns={cluster_col: new_colname})
-        return gdf
-
-
-def _draw_labels(w, gdf, cluster_col, markov, unit_index, verbose):
+    return codes
+
+
+def _draw_labels(adjacency, labels, markov, units, verbose):
     """Draw a random class label from the spatially-conditioned transition rates.
 
     Parameters
     ----------
-    w : libpysal.weights.W
-        spatial weights object
-    gdf : geopandas.GeoDataFrame
-        geodataframe of observations with class/cluster labels as a column
-    cluster_col : string
-        the column on the dataframe that holds class labels
+    adjacency : scipy.sparse.csr_matrix
+        sparse spatial weights matrix
+    labels : numpy.ndarray
+        current class label of each unit
     markov : giddy.Spatial_Markov
         an instance of a Spatial_Markov class
-    unit_index : string
-        the column on the dataframe that identifies unique spatial units
+    units : numpy.ndarray
+        identifier of each unit, used in warnings
 
     Returns
     -------
-    geopandas.GeoDataFrame
-        long-form geodataframe with predicted cluster labels stored in the `new_colname` column
+    numpy.ndarray
+        predicted class label of each unit
     """
-    gdf = gdf.copy()
-    gdf = gdf.dropna(subset=[cluster_col])
-    lags = w.lag(gdf[cluster_col].values, categorical=True, ties='tryself')
-    clusters = gdf.reset_index()[cluster_col].values
-    classes = markov.classes
-    cluster_idx = dict(zip(classes, list(range(len(classes)))))
-
-    labels = {}
-    for i, lag in enumerate(lags):
-        #  select the transition matrix using the label of unit's spatial lag
-        spatial_context = np.nan_to_num(markov.P, posinf=0.0, neginf=0.0)[
-            cluster_idx[lag]
-        ]
-        #  select the class row from the transition matrix using the unit's label
-        probs = spatial_context[cluster_idx[clusters[i]]]
-        probs /= probs.sum()  # correct for tolerance, see https://stackoverflow.com/questions/25985120/numpy-1-9-0-valueerror-probabilities-do-not-sum-to-1
-        probs = np.nan_to_num(probs.flatten())
-        if sum(probs) == 0:
-            # in case obs have a modal neighbor never before seen in the model
-            # (so all transition probs are 0)
-            # fall back to the aspatial transition matrix
-            if verbose:
-                warn(
-                    f"Falling back to aspatial transition rule for unit "
-                    f"{gdf[unit_index][i]}",
-                    stacklevel=2,
-                )
-            probs = markov.p[cluster_idx[clusters[i]]].flatten()
+    classes = pd.Index(markov.classes)
+    clusters = _class_codes(classes, labels)
+    lags = _categorical_lag(adjacency, clusters, len(classes))
+
+    # select the transition matrix using the label of each unit's spatial lag,
+    # then the class row from that matrix using the unit's own label
+    P = np.nan_to_num(markov.P, posinf=0.0, neginf=0.0)
+    probs = P[lags, clusters]
+    totals = probs.sum(axis=1)
+    # in case obs have a modal neighbor never before seen in the model
+    # (so all transition probs are 0), fall back to the aspatial transition matrix
+    unseen = totals == 0
+    if unseen.any():
+        if verbose:
+            warn(
+                f"Falling back to aspatial transition rule for units "
+                f"{units[unseen].tolist()}",
+                stacklevel=2,
+            )
+        probs[unseen] = _aspatial_rules(markov)[clusters[unseen]]
+        totals[unseen] = probs[unseen].sum(axis=1)
+    probs /= totals[:, None]
+
+    draws = _sample_classes(probs, np.random.random_sample(len(probs)))
+    return classes.values[draws]
+
+
+def _sample_classes(probs, u):
+    """Draw a class index for each row of `probs` by inverse-CDF sampling.
 
-        labels[i] = np.random.choice(classes, p=probs)
+    Parameters
+    ----------
+    probs : numpy.ndarray
+        (..., k) array of (possibly unnormalized) class probabilities
+    u : numpy.ndarray
+        array of uniform draws on [0, 1) with the shape of `probs` minus its last
+        axis
 
-    labels = pd.Series(labels, name=cluster_col, index=gdf.index)
-    out = gdf[[unit_index, gdf.geometry.name]]
-    predicted = gpd.GeoDataFrame(pd.concat([labels, out], axis=1))
-    return predicted
+    Returns
+    -------
+    numpy.ndarray
+        integer index of the class drawn for each row
+    """
+    cdf = np.cumsum(probs, axis=-1)
+    cdf /= cdf[..., -1:]
+    # the first class whose cumulative probability exceeds the draw
+    return np.minimum((cdf <= u[..., None]).sum(axis=-1), probs.shape[-1] - 1)
 
 
 def draw_sequence_from_gdf(
@@ -429,6 +613,7 @@ def draw_sequence_from_gdf(
     increment=None,
     seed=None,
     aspatial=False,
+    wide=False,
 ):
     """Draw a set of class labels for each unit in a geodataframe using transition
     probabilities defined by a giddy.Spatial_Markov model and the spatial lag of each
@@ -438,7 +623,7 @@ def draw_sequence_from_gdf(
     ----------
     gdf : geopandas.GeoDataFrame
         geodataframe of observations with class/cluster labels as a column
-    w : libpysal.weights.W
+    w : libpysal.weights.W or libpysal.graph.Graph
         spatial weights object that defines the neigbhbor graph for each unit.
     label_column : str
         the column on the dataframe that holds class labels
@@ -462,6 +647,12 @@ def draw_sequence_from_gdf(
     seed: int
         seed for  reproducible pseudo-random results. Used to create a SeedSequence and
         spawn a set of Generators using PCG64. If None, uses the current time
+    aspatial : bool, optional
+        if True, draw labels from the aspatial transition rules, by default False
+    wide : bool, optional
+        if True, return a (units x time-steps) dataframe of simulated labels with
+        the index of `gdf[gdf[time_column]==start_time]` and one column per
+        simulated time period, instead of a long-form geodataframe. By default False
 
     Returns
     -------
@@ -472,14 +663,13 @@ def draw_sequence_from_gdf(
     """
     assert increment
 
+    if start_time is None:
+        start_time = gdf[time_column].max()
     steps = [start_time + (increment * step) for step in range(time_steps + 1)]
     steps = steps[1:]
-    gdf = gdf.copy()
-    gdf = gdf[[label_column, time_column, gdf.geometry.name]].copy()
-
-    dfs = list()
-
-    current_df = gdf[gdf[time_column] == start_time].reset_index()
+    start = gdf.loc[
+        gdf[time_column] == start_time, [label_column, time_column, gdf.geometry.name]
+    ]
 
     if seed is None:
         seed = int(time())
@@ -488,37 +678,305 @@ def draw_sequence_from_gdf(
     child_seqs = base_seq.spawn(time_steps)
     generators = [PCG64(seq) for seq in child_seqs]
 
-    dfs.append(current_df)
+    adjacency = sparse.csr_matrix(w.sparse)
+    labels = [start[label_column].values]
     # must run in sequence because we need the prior time's spatial lag
-    for i, step in enumerate(tqdm(steps)):
-        # `steps` and `dfs` are off by one so the ith in dfs is the previous time period
-        current_df = dfs[i].copy()
-        predicted_labels = _draw_labels_from_gdf(
-            current_df, w, label_column, smk, generators[i], aspatial=aspatial
+    for i in tqdm(range(time_steps)):
+        labels.append(
+            _draw_next_labels(
+                labels[-1], adjacency, smk, generators[i], aspatial=aspatial
+            )
+        )
+
+    if wide:
+        return pd.DataFrame(
+            np.column_stack(labels[1:]),
+            index=start.index,
+            columns=pd.Index(steps, name=time_column),
         )
-        predicted_df = gdf[gdf[time_column] == start_time].copy().reset_index()
-        # overwrite labels with predictions for the new time period
-        predicted_df[label_column] = predicted_labels
-        predicted_df[time_column] = step
 
-        dfs.append(predicted_df)
-    simulated = pd.concat(dfs)
+    # attach the geometries once, for every period at the same time
+    start = start.reset_index()
+    simulated = start.take(np.tile(np.arange(len(start)), time_steps + 1))
+    simulated[label_column] = np.concatenate(labels)
+    simulated[time_column] = np.repeat([start_time, *steps], len(start))
 
     return simulated
 
 
-def _draw_labels_from_gdf(gdf, w, label_column, smk, seed, aspatial=False):
-    """Draw set of new labels given a geodataframe and a spatial Markov transition model
+def simulate_ensemble(
+    smk,
+    gdf,
+    w,
+    n_replicates=100,
+    time_steps=1,
+    label_column=None,
+    time_column="year",
+    start_time=None,
+    increment=None,
+    seed=None,
+    aspatial=False,
+    n_jobs=1,
+    backend="loky",
+):
+    """Simulate many replicate label sequences from a spatial Markov model.
+
+    Replicates are simulated together as a (replicates x units) array of labels,
+    and each replicate draws from its own PCG64 stream spawned from a single
+    SeedSequence, so results are reproducible for a given seed regardless of
+    `n_jobs`. Rather than returning every simulated trajectory, the simulation is
+    summarized by the share of units in each class for every replicate and the
+    probability that each unit is in each class.
 
     Parameters
     ----------
+    smk : giddy.Spatial_Markov
+        an instance of a Spatial_Markov class created from the giddy package
+        or `geosnap.analyze.transition`
     gdf : geopandas.GeoDataFrame
-        a geodataframe defining the study region, including a column holding class labels
-    w : libpysal.Weights
-        a spatial weights matrix relating units to one another. This should be the same
-        W object that was used to fit the Spatial_Markov instance
+        geodataframe of observations with class/cluster labels as a column
+    w : libpysal.weights.W or libpysal.graph.Graph
+        spatial weights object that defines the neigbhbor graph for each unit, with
+        units in the order of `gdf[gdf[time_column]==start_time]`
+    n_replicates : int, optional
+        number of replicate sequences to simulate, by default 100
+    time_steps : int, optional
+        the number of time-steps to simulate in each replicate, by default 1
     label_column : str
-        the column in gdf holding class labels
+        the column on the dataframe that holds class labels
+    time_column : str, optional
+        column on dataframe that identifies unique time periods, by default "year"
+    start_time : str, int, or float, optional
+        Time period whose labels begin each sequence. If None, use the most recent
+        time period in `gdf[time_column]`. By default None
+    increment : int, optional
+        styled increment each time-step referrs to (e.g. 10 for a model fitted to
+        decadal Census data). If None, time-steps are numbered 1...`time_steps`
+    seed : int, optional
+        seed for reproducible pseudo-random results. Used to create a SeedSequence
+        that spawns one PCG64 stream per replicate. If None, uses the current time
+    aspatial : bool, optional
+        if True, draw labels from the aspatial transition rules, by default False
+    n_jobs : int, optional
+        number of processes to spread the replicates across. If -1, all available
+        cores will be used, by default 1
+    backend : str, optional
+        computation backend passed to joblib. One of {'multiprocessing', 'loky',
+        'threading'}, by default "loky"
+
+    Returns
+    -------
+    dict
+        dictionary of summary dataframes with class labels as columns:
+
+            * class_shares : share of units in each class, indexed by time
+              period and replicate
+            * unit_probabilities : share of replicates in which each unit is in
+              each class, indexed by time period and the index of `gdf`
+    """
+    assert label_column and label_column in gdf.columns, (
+        f"The input dataframe has no column named {label_column}"
+    )
+    if start_time is None:
+        start_time = gdf[time_column].max()
+    if seed is None:
+        seed = int(time())
+    if increment is None:
+        times = list(range(1, time_steps + 1))
+    else:
+        times = [start_time + (increment * step) for step in range(1, time_steps + 1)]
+
+    current = gdf.loc[gdf[time_column] == start_time, label_column]
+    classes = pd.Index(smk.classes)
+    codes = _class_codes(classes, current.values)
+    table = _transition_table(smk, aspatial=aspatial)
+    adjacency = sparse.csr_matrix(w.sparse)
+
+    streams = SeedSequence(seed).spawn(n_replicates)
+    chunks = np.array_split(
+        np.arange(n_replicates), min(effective_n_jobs(n_jobs), n_replicates)
+    )
+    results = Parallel(n_jobs=n_jobs, backend=backend)(
+        delayed(_simulate_replicates)(
+            table, codes, adjacency, [streams[i] for i in chunk], time_steps
+        )
+        for chunk in chunks
+    )
+    shares = np.concatenate([share for share, _ in results], axis=1)
+    unit_probs = sum(counts for _, counts in results) / n_replicates
+
+    class_shares = pd.DataFrame(
+        shares.reshape(-1, len(classes)),
+        index=pd.MultiIndex.from_product(
+            [times, range(n_replicates)], names=[time_column, "replicate"]
+        ),
+        columns=classes,
+    )
+    unit_probabilities = pd.DataFrame(
+        unit_probs.reshape(-1, len(classes)),
+        index=pd.MultiIndex.from_product(
+            [times, current.index], names=[time_column, current.index.name]
+        ),
+        columns=classes,
+    )
+    return _Map(class_shares=class_shares, unit_probabilities=unit_probabilities)
+
+
+def _aspatial_rules(smk):
+    """Row-normalized aspatial transition probabilities of a Spatial_Markov model.
+
+    A class with no observed transitions out of it (e.g. one that only appears in
+    the final period) has no rule to follow, so its units stay in their class.
+    """
+    aspatial_p = np.nan_to_num(smk.p)
+    stuck = aspatial_p.sum(axis=1) == 0
+    aspatial_p[stuck] = np.eye(len(aspatial_p))[stuck]
+    return aspatial_p / aspatial_p.sum(axis=1, keepdims=True)
+
+
+def _transition_table(smk, aspatial=False):
+    """Transition probabilities indexed by (lag class, current class, next class).
+
+    Rows without spatial transition rules are filled with the aspatial rules.
+    """
+    aspatial_p = _aspatial_rules(smk)
+    k = len(aspatial_p)
+    if aspatial:
+        return np.broadcast_to(aspatial_p, (k, k, k))
+    P = np.nan_to_num(smk.P)
+    null = P.sum(axis=2) == 0
+    return np.where(null[..., None], aspatial_p[None], P)
+
+
+def _simulate_replicates(
+    table, codes, adjacency, streams, time_steps, max_cells=2**25
+):
+    """Simulate a set of replicates, returning class shares and per-unit class counts.
+
+    Parameters
+    ----------
+    table : numpy.ndarray
+        (k, k, k) transition probabilities from `_transition_table`
+    codes : numpy.ndarray
+        integer class of each unit at the start of the simulation
+    adjacency : scipy.sparse.csr_matrix
+        sparse spatial weights matrix
+    streams : list of numpy.random.SeedSequence
+        one seed sequence per replicate
+    time_steps : int
+        number of time-steps to simulate
+    max_cells : int, optional
+        replicates are simulated in batches holding at most this many
+        (replicate, unit, class) probabilities at once
+
+    Returns
+    -------
+    tuple
+        (time_steps, replicates, k) array of class shares and (time_steps, n, k)
+        array counting the replicates in which each unit is in each class
+    """
+    n, k = len(codes), table.shape[-1]
+    shares = np.zeros((time_steps, len(streams), k))
+    unit_counts = np.zeros((time_steps, n, k))
+    batch_size = max(1, max_cells // (n * k))
+    for start in range(0, len(streams), batch_size):
+        generators = [default_rng(PCG64(seq)) for seq in streams[start : start + batch_size]]
+        current = np.tile(codes, (len(generators), 1))
+        for step in range(time_steps):
+            # must run in sequence because we need the prior time's spatial lag
+            lags = _categorical_lag(adjacency, current, k)
+            u = np.vstack([rng.random(n) for rng in generators])
+            current = _sample_classes(table[lags, current], u)
+            onehot = current[..., None] == np.arange(k)
+            shares[step, start : start + len(generators)] = onehot.mean(axis=1)
+            unit_counts[step] += onehot.sum(axis=0)
+    return shares, unit_counts
+
+
+def _categorical_lag(adjacency, codes, k, random_ties=False):
+    """Modal class among the neighbors of each unit, for one or more sets of labels.
+
+    Neighbor classes are tallied (weighted by the spatial weights) with a single
+    sparse product between the adjacency matrix and the one-hot encoded labels of
+    every replicate. Ties are broken as with `ties="tryself"` in
+    `libpysal.weights.lag_categorical`, by adding the unit's own class to the
+    tally with the mean weight of its neighbors. Any remaining tie is broken by
+    the lowest class index, or, if `random_ties` is True, at random with the
+    global NumPy generator exactly as libpysal does. Units without neighbors keep
+    their own class.
+
+    Parameters
+    ----------
+    adjacency : scipy.sparse.csr_matrix
+        (n, n) sparse spatial weights matrix
+    codes : numpy.ndarray
+        (n,) or (replicates, n) array of integer class codes in [0, k)
+    k : int
+        number of classes
+    random_ties : bool, optional
+        whether to break the ties that remain after considering each unit's own
+        class at random (one draw per tied unit, in order) rather than by the
+        lowest class index, by default False
+
+    Returns
+    -------
+    numpy.ndarray
+        integer class code of the spatial lag of each unit, with the shape of
+        `codes`
+    """
+    codes = np.asarray(codes)
+    batch = np.atleast_2d(codes)
+    n_replicates, n = batch.shape
+    onehot = sparse.csr_matrix(
+        (
+            np.ones(batch.size),
+            (
+                np.tile(np.arange(n), n_replicates),
+                (batch + k * np.arange(n_replicates)[:, None]).ravel(),
+            ),
+        ),
+        shape=(n, n_replicates * k),
+    )
+    counts = (adjacency @ onehot).toarray().reshape(n, n_replicates, k)
+    counts = counts.transpose(1, 0, 2)
+
+    n_neighbors = np.asarray((adjacency != 0).sum(axis=1)).ravel()
+    mean_weight = np.ones(n)
+    np.divide(
+        np.asarray(adjacency.sum(axis=1)).ravel(),
+        n_neighbors,
+        out=mean_weight,
+        where=n_neighbors > 0,
+    )
+    tied = (counts == counts.max(axis=-1, keepdims=True)).sum(axis=-1) > 1
+    own = np.take_along_axis(counts, batch[..., None], axis=-1)
+    own += np.where(tied, mean_weight, 0)[..., None]
+    np.put_along_axis(counts, batch[..., None], own, axis=-1)
+    # argmax returns the lowest class among any remaining modes
+    lags = counts.argmax(axis=-1)
+    if random_ties:
+        modes = counts == counts.max(axis=-1, keepdims=True)
+        for i, j in zip(*np.nonzero(modes.sum(axis=-1) > 1), strict=True):
+            lags[i, j] = np.random.choice(np.flatnonzero(modes[i, j]))
+    return lags.reshape(codes.shape)
+
+
+def _lag_labels(adjacency, labels):
+    """Categorical spatial lag of an array of labels (see `_categorical_lag`)."""
+    classes, codes = np.unique(np.asarray(labels), return_inverse=True)
+    return classes[_categorical_lag(adjacency, codes, len(classes))]
+
+
+def _draw_next_labels(labels, adjacency, smk, seed, aspatial=False):
+    """Draw set of new labels given the current labels and a spatial Markov transition model
+
+    Parameters
+    ----------
+    labels : numpy.ndarray
+        current class label of each unit
+    adjacency : scipy.sparse.csr_matrix
+        a sparse spatial weights matrix relating units to one another. This should
+        come from the same weights that were used to fit the Spatial_Markov instance
     smk : giddy.Spatial_Markov
         a spatial Markov transition model created by the pysal giddy package
         or geosnap.analyze.transition
@@ -531,16 +989,14 @@ def _draw_labels_from_gdf(gdf, w, label_column, smk, seed, aspatial=False):
         an array of simulated class labels drawn from the conditional probabilities
         provided in the Spatial_Markov object
     """
-    classes = smk.classes
-    labels = gdf[label_column].values
-    lags = lag_categorical(w, labels)
+    lags = _lag_labels(adjacency, labels)
     probs = _conditional_probs_from_smk(
         labels, lags, smk, fill_null_probs=True, aspatial=aspatial
     )
     assert len(lags) == len(probs), (
         "Lag values and probability vectors are different lengths"
     )
-    simulated_labels = _draw_labels_from_probs(classes, probs=probs, seed=seed)
+    simulated_labels = _draw_labels_from_probs(smk.classes, probs=probs, seed=seed)
 
     return simulated_labels
 
@@ -552,8 +1008,8 @@ def _draw_labels_from_probs(classes, probs, seed):
     ----------
     classes : list-like
         set of class labels
-    probs : list-like
-        list of probabilities
+    probs : array-like
+        (n, k) array where each row holds the probabilities of drawing each class
     seed: int or numpy.random.Generator instance
         seed passed to np.random.default_rng for reproducible pseudo-random results
     verbose : bool, optional
@@ -562,17 +1018,13 @@ def _draw_labels_from_probs(classes, probs, seed):
 
     Returns
     -------
-    list
-        list of labels drawn from `classes` with size n_probs
+    numpy.ndarray
+        array of labels drawn from `classes` with size n_probs
     """
     rng = default_rng(seed=seed)
-    probs = pd.Series(probs)
-    # for each set of probabilities in the array, draw a label
-    # this could also be done in parallel. We could also take multiple draws per
-    # unit by passing a `size` argument to rng.choice
-    probs = probs.apply(lambda x: rng.choice(classes, p=x))
-
-    return probs.values
+    probs = np.asarray(probs, dtype=float)
+    draws = _sample_classes(probs, rng.random(len(probs)))
+    return np.asarray(classes)[draws]
 
 
 def _conditional_probs_from_smk(
@@ -592,52 +1044,33 @@ def _conditional_probs_from_smk(
 
     Returns
     -------
-    list
-        list of lists, where each element of the outer list is
-        a set of transition probabilities, and each element of the innerr
-        list(s) is the probability of transitioning into class with index i
+    numpy.ndarray
+        (n, k) array where each row is a set of transition probabilities, and
+        element i of each row is the probability of transitioning into class with
+        index i
     """
-    # classes = pd.Categorical(smk.classes)
-    class_idx = dict(zip(smk.classes, range(len(smk.classes))))
-
-    # mapping back to the order each class is given in the smk object
-    # class_idx = dict(zip(classes, list(range(len(classes)))))
-
-    # print(class_idx)
-
-    probs = list()
-    # this piece could be parallelized as long as it gets concatenated back in order
-    for i, _ in enumerate(labels):
-        current_label = labels[i]
-        current_class_idx = class_idx[current_label]
-        # print(current_class_idx)
-
-        aspatial_p = np.nan_to_num(smk.p[current_class_idx]).flatten()
-        aspatial_p /= aspatial_p.sum()
-        # print(i,class_idx[lags[i]])
-        lag_idx = class_idx[lags[i]]
-        conditional_matrix = smk.P[lag_idx]
-        p = conditional_matrix[current_class_idx].flatten()
-        # correct for tolerance, see https://stackoverflow.com/questions/25985120/numpy-1-9-0-valueerror-probabilities-do-not-sum-to-1
-        # p = np.nan_to_num(p)
-        if aspatial:
-            probs.append(aspatial_p)
-        else:
-            if p.sum() == 0:
-                if fill_null_probs:
-                    warn(
-                        f"No spatial transition rules for {current_label} with context {lags[i]} "
-                        "falling back to aspatial transition rules",
-                        stacklevel=2,
-                    )
-                    probs.append(aspatial_p)
-                else:
-                    raise ValueError(
-                        f"No spatial transition rules for {current_label} with context {lags[i]} "
-                    )
-            else:
-                # p /= p.sum()
-
-                probs.append(np.nan_to_num(p))
+    classes = pd.Index(smk.classes)
+    label_idx = _class_codes(classes, labels)
+    aspatial_p = _aspatial_rules(smk)
+    if aspatial:
+        return aspatial_p[label_idx]
+
+    # select the row for each unit's label from the matrix for its spatial context
+    probs = np.nan_to_num(smk.P[_class_codes(classes, lags), label_idx])
+    null = probs.sum(axis=1) == 0
+    if null.any():
+        pairs = sorted(
+            set(zip(np.asarray(labels)[null].tolist(), np.asarray(lags)[null].tolist()))
+        )
+        if not fill_null_probs:
+            raise ValueError(
+                f"No spatial transition rules for {pairs[0][0]} with context {pairs[0][1]} "
+            )
+        warn(
+            "No spatial transition rules for (label, context) pairs "
+            f"{pairs}; falling back to aspatial transition rules",
+            stacklevel=2,
+        )
+        probs[null] = aspatial_p[label_idx[null]]
 
     return probs
@@ -1,25 +1,47 @@
 """Functions for clustering and regionalization with spatiotemporal data"""
 
+import pathlib
+
 import geopandas as gpd
 import numpy as np
 import pandas as pd
+import pyarrow.dataset as ds
+from joblib import Parallel, delayed
+from libpysal.graph import Graph
 from libpysal.weights.contiguity import Queen, Rook, Voronoi
 from libpysal.weights.distance import KNN, DistanceBand
+from sklearn.base import clone
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.metrics import calinski_harabasz_score, davies_bouldin_score
 from sklearn.preprocessing import StandardScaler
-from spopt.region.base import form_single_component
 from tqdm.auto import tqdm
 
 from .._data import _Map
 from ._cluster_wrappers import (
     affinity_propagation,
     gaussian_mixture,
+    gaussian_mixture_path,
     hdbscan,
     kmeans,
+    kmeans_path,
     spectral,
     ward,
+    ward_path,
+)
+from ._graphs import (
+    _cache_get,
+    _cache_put,
+    _graph_key,
+    connected_weights,
+    subset_graph,
 )
 from ._model_results import ModelResults
 from ._region_wrappers import azp, kmeans_spatial, max_p, skater, spenc, ward_spatial
+from ._silhouettes import (
+    boundary_silhouette_samples,
+    path_silhouette_samples,
+    silhouette_samples_by,
+)
 
 np.seterr(divide="ignore", invalid="ignore")
 
@@ -31,6 +53,286 @@ Ws = {
     "distanceband": DistanceBand,
 }
 
+_cluster_methods = {
+    "ward": ward,
+    "kmeans": kmeans,
+    "affinity_propagation": affinity_propagation,
+    "gaussian_mixture": gaussian_mixture,
+    "spectral": spectral,
+    "hdbscan": hdbscan,
+}
+
+_region_methods = {
+    "azp": azp,
+    "spenc": spenc,
+    "ward_spatial": ward_spatial,
+    "skater": skater,
+    "max_p": max_p,
+    "kmeans_spatial": kmeans_spatial,
+}
+
+
+def _standard_scale(mean, var, n_samples):
+    """Return the standard deviations used to scale features with these moments.
+
+    Like sklearn, (numerically) constant features are left unscaled.
+    """
+    eps = np.finfo(np.float64).eps
+    constant = var <= n_samples * eps * var + (n_samples * mean * eps) ** 2
+    scale = np.sqrt(var)
+    scale[constant | (scale < 10 * eps)] = 1.0
+    return scale
+
+
+def _fit_standard_scaler(scaler, mean, var, n_samples):
+    """Return a copy of a StandardScaler fitted to the given moments."""
+    fitted = clone(scaler)
+    fitted.n_features_in_ = len(mean)
+    fitted.n_samples_seen_ = n_samples
+    fitted.mean_ = mean
+    fitted.var_ = var
+    fitted.scale_ = None
+    if scaler.with_std:
+        fitted.scale_ = _standard_scale(mean, var, n_samples)
+    return fitted
+
+
+def _fit_by_period(data, scaler):
+    """Fit a copy of `scaler` to the observations in each time period.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        dataframe of (complete) input features whose first index level holds the
+        time period of each observation
+    scaler : scaler from sklearn.preprocessing
+        scaler to fit. The moments for a StandardScaler are computed for every
+        period at once using segmented reductions over the period codes, other
+        scalers are cloned and fit on each period
+
+    Returns
+    -------
+    dict
+        fitted scalers keyed by time period
+    """
+    values = data.to_numpy(dtype=float)
+    codes, periods = pd.factorize(data.index.get_level_values(0))
+
+    if isinstance(scaler, StandardScaler):
+        counts = np.bincount(codes, minlength=len(periods))
+
+        def _period_sums(x):
+            return np.column_stack(
+                [np.bincount(codes, weights=col, minlength=len(periods)) for col in x.T]
+            )
+
+        means = _period_sums(values) / counts[:, None]
+        var = _period_sums((values - means[codes]) ** 2) / counts[:, None]
+        return {
+            period: _fit_standard_scaler(scaler, means[code], var[code], counts[code])
+            for code, period in enumerate(periods)
+        }
+    return {
+        period: clone(scaler).fit(values[codes == code])
+        for code, period in enumerate(periods)
+    }
+
+
+def _scale_by_period(data, scaler, scalers=None):
+    """Rescale the columns of `data` separately within each time period.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        dataframe of (complete) input features whose first index level holds the
+        time period of each observation
+    scaler : scaler from sklearn.preprocessing
+        scaler used to rescale the data
+    scalers : dict, optional
+        fitted scalers keyed by time period (as returned by `_fit_by_period`). If
+        None, a copy of `scaler` is fit to each period in `data`. Periods without a
+        fitted scaler are rescaled with `scaler` itself, which must then be fitted
+
+    Returns
+    -------
+    pandas.DataFrame
+        rescaled copy of `data` with the same index and columns
+    """
+    if scalers is None:
+        scalers = _fit_by_period(data, scaler)
+    values = data.to_numpy(dtype=float, copy=True)
+    codes, periods = pd.factorize(data.index.get_level_values(0))
+    fitted = [scalers.get(period, scaler) for period in periods]
+
+    if fitted and all(isinstance(s, StandardScaler) for s in fitted):
+        # rescale every period at once
+        if scaler.with_mean:
+            values -= np.stack([s.mean_ for s in fitted])[codes]
+        if scaler.with_std:
+            values /= np.stack([s.scale_ for s in fitted])[codes]
+    else:
+        for code, period_scaler in enumerate(fitted):
+            rows = np.flatnonzero(codes == code)
+            values[rows] = period_scaler.transform(values[rows])
+
+    return pd.DataFrame(values, index=data.index, columns=data.columns)
+
+
+def _scale_data(data, scaler, pooling):
+    """Rescale a (complete) feature dataframe indexed by (time, unit).
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        input features without missing values, indexed by time period and unit
+    scaler : None or scaler from sklearn.preprocessing
+        scaler used to rescale the data. If None, the data are not rescaled
+    pooling : ["fixed", "pooled", "unique"]
+        whether to scale within each time period ("fixed" or "unique") or across
+        all time periods at once ("pooled")
+
+    Returns
+    -------
+    pandas.DataFrame
+        rescaled features
+    """
+    if scaler:
+        if pooling in ["fixed", "unique"]:
+            # if fixed (or unique), scale within each time period. The scaler
+            # itself is fit to all periods as the reference for new periods
+            scaler.fit(data.values)
+            data = _scale_by_period(data, scaler)
+
+        elif pooling == "pooled":
+            # if pooled, scale the whole series at once
+            data.loc[:, data.columns] = scaler.fit_transform(data.values)
+
+    # the rescalar can create nans if a column has no variance, so fill with 0
+    return data.fillna(0)
+
+
+def _weights_kind(W):
+    """Name a weights class for the graph cache."""
+    return f"{W.__module__}.{W.__qualname__}"
+
+
+def _region_weights(df, W, weights_kwargs, ids=None):
+    """Build a spatial weights object for one period, joining disconnected components."""
+    if isinstance(W, Graph):
+        # subset a precomputed graph indexed by unit id
+        return connected_weights(df, subset_graph(W, ids, index=df.index).to_W())
+    key = _graph_key(df, _weights_kind(W), weights_kwargs, ids=ids)
+    w = _cache_get(key, weights=True)
+    if w is None:
+        w = W.from_dataframe(df, **weights_kwargs)
+        _cache_put(key, w, weights=True)
+    return connected_weights(df, w, key=key)
+
+
+_cluster_paths = {
+    "ward": ward_path,
+    "kmeans": kmeans_path,
+    "gaussian_mixture": gaussian_mixture_path,
+}
+
+
+def _fit_k_metrics(X, n_clusters, method, random_state, cluster_kwargs, estimator):
+    """Fit a cluster model with `n_clusters` and return its fit metrics."""
+    model = _cluster_methods[method](
+        X,
+        n_clusters=n_clusters,
+        best_model=False,
+        verbose=False,
+        random_state=random_state,
+        **cluster_kwargs,
+    )
+    return _k_metrics(X, model.labels_, random_state, estimator)
+
+
+def _k_metrics(X, labels, random_state, estimator):
+    """Compute the fit metrics for a set of cluster labels."""
+    if estimator == "auto":
+        estimator = "exact" if X.shape[0] <= 10000 else "sampled"
+    silhouette = silhouette_samples_by(
+        X, labels, estimator=estimator, random_state=random_state
+    )
+    return estimator, pd.Series(
+        {
+            "silhouette_score": np.nanmean(silhouette),
+            "calinski_harabasz_score": calinski_harabasz_score(X, labels),
+            "davies_bouldin_score": davies_bouldin_score(X, labels),
+        },
+    )
+
+
+def _fit_region_k_metrics(
+    df, X, w, n_clusters, method, columns, threshold_variable, threshold, region_kwargs
+):
+    """Fit a regionalization with `n_clusters` and return its fit metrics.
+
+    All metrics, including the path and boundary silhouettes, are computed on `X`,
+    the rescaled features the regionalization is fit on, so they match the
+    diagnostics of the ModelResults from `regionalize`.
+    """
+    model = _region_methods[method](
+        df,
+        columns=columns,
+        w=w,
+        n_clusters=n_clusters,
+        threshold_variable=threshold_variable,
+        threshold=threshold,
+        **region_kwargs,
+    )
+    labels = model.labels_
+    boundary = boundary_silhouette_samples(X, labels, w)
+    return pd.Series(
+        {
+            "silhouette_score": silhouette_samples_by(X, labels).mean(),
+            "calinski_harabasz_score": calinski_harabasz_score(X, labels),
+            "davies_bouldin_score": davies_bouldin_score(X, labels),
+            "path_silhouette": path_silhouette_samples(X, labels, w).mean(),
+            # average of non-zero boundary-silhouettes
+            "boundary_silhouette": boundary[boundary != 0].mean(),
+        },
+    )
+
+
+def _regionalize_period(
+    df,
+    W,
+    weights_kwargs,
+    w,
+    w0,
+    method,
+    columns,
+    n_clusters,
+    threshold_variable,
+    threshold,
+    region_kwargs,
+):
+    """Fit a regionalization for a single time period.
+
+    The weights are built from `df` unless a (cached) weights object `w` is given,
+    and their components are joined unless the (cached) joined weights `w0` are
+    given, so `df` only needs geometries when `w0` is None. Returns the fitted
+    model, the weights built from the data, and the weights with disconnected
+    components joined.
+    """
+    if w is None:
+        w = W.from_dataframe(df, **weights_kwargs)
+    if w0 is None:
+        w0 = connected_weights(df, w)
+    model = _region_methods[method](
+        df,
+        columns=columns,
+        w=w0,
+        n_clusters=n_clusters,
+        threshold_variable=threshold_variable,
+        threshold=threshold,
+        **region_kwargs,
+    )
+    return model, w, w0
+
 
 def cluster(
     gdf,
@@ -47,6 +349,9 @@ def cluster(
     cluster_kwargs=None,
     model_colname=None,
     return_model=False,
+    labels_only=False,
+    n_jobs=-1,
+    backend="loky",
 ):
     """Create a geodemographic typology by running a cluster analysis on the study area's neighborhood attributes.
 
@@ -89,13 +394,26 @@ def cluster(
         named after the clustering method, the name will be incremented with a number
     return_model: bool
         if True, return the clustering model for further inspection (default is False)
+    labels_only: bool
+        if True, only the feature columns and index keys are copied from the input,
+        which may be a plain DataFrame, and only the labels are returned rather than
+        a copy of the full GeoDataFrame. If the input has geometries, the returned
+        ModelResults joins them lazily when diagnostics or plots need them
+        (default is False)
+    n_jobs : int, optional
+        number of cores used to fit the models for each time period in parallel
+        when pooling="unique". If -1, all available cores will be used, by default -1
+    backend : str, optional
+        computation backend passed to joblib. One of {'multiprocessing', 'loky',
+        'threading'}, by default "loky"
 
     Returns
     -------
     gdf : geopandas.GeoDataFrame
         GeoDataFrame with a column (model_colname) of neighborhood cluster labels
         appended as a new column. If model_colname exists as a column on the DataFrame
-        then the column will be incremented.
+        then the column will be incremented. If labels_only is True, a DataFrame with
+        `temporal_index`, `unit_index`, and `model_colname` columns instead.
 
     model : named tuple
         A tuple with attributes X, columns, labels, instance, W, which store the
@@ -117,14 +435,7 @@ def cluster(
     if not cluster_kwargs:
         cluster_kwargs = dict()
 
-    specification = {
-        "ward": ward,
-        "kmeans": kmeans,
-        "affinity_propagation": affinity_propagation,
-        "gaussian_mixture": gaussian_mixture,
-        "spectral": spectral,
-        "hdbscan": hdbscan,
-    }
+    specification = _cluster_methods
 
     if scaler == "std":
         scaler = StandardScaler()
@@ -145,6 +456,24 @@ def cluster(
     if not columns:
         raise ValueError("You must provide a subset of columns as input")
 
+    if labels_only:
+        return _cluster_labels(
+            gdf,
+            n_clusters=n_clusters,
+            method=method,
+            best_model=best_model,
+            columns=columns,
+            verbose=verbose,
+            temporal_index=temporal_index,
+            unit_index=unit_index,
+            scaler=scaler,
+            pooling=pooling,
+            random_state=random_state,
+            cluster_kwargs=cluster_kwargs,
+            model_colname=model_colname,
+            return_model=return_model,
+        )
+
     gdf = gdf.copy()
 
     times = gdf[temporal_index].unique()
@@ -153,19 +482,7 @@ def cluster(
     # this is the dataset we'll operate on
     data = gdf.copy()[columns]
     data = data.dropna(how="any", subset=columns)
-
-    if scaler:
-        if pooling in ["fixed", "unique"]:
-            # if fixed (or unique), scale within each time period
-            for time in times:
-                data.loc[time] = scaler.fit_transform(data.loc[time].values)
-
-        elif pooling == "pooled":
-            # if pooled, scale the whole series at once
-            data.loc[:, columns] = scaler.fit_transform(data.values)
-
-    # the rescalar can create nans if a column has no variance, so fill with 0
-    data = data.fillna(0)
+    data = _scale_data(data, scaler, pooling)
 
     if pooling != "unique":
 
@@ -179,6 +496,9 @@ def cluster(
             **cluster_kwargs,
         )
         labels = model.labels_
+        # keep the scaled features for the model diagnostics, aligned to gdf rows
+        complete = gdf[columns].notna().all(axis=1).to_numpy()
+        X = data.to_numpy()
         data = data.reset_index()
         clusters = pd.DataFrame(
             {
@@ -194,6 +514,8 @@ def cluster(
         model_data = gdf[
             columns + [temporal_index, unit_index, model_colname, gdf.geometry.name]
         ].dropna()
+        X_full = np.full((len(gdf), len(columns)), np.nan)
+        X_full[complete] = X
         results = ModelResults(
             df=model_data,
             columns=columns,
@@ -205,6 +527,7 @@ def cluster(
             unit_index=unit_index,
             scaler=scaler,
             pooling=pooling,
+            X=X_full[model_data.index.to_numpy()],
         )
         if return_model:
             return gdf, results
@@ -213,36 +536,40 @@ def cluster(
     elif pooling == "unique":
         models = _Map()
         data = data.reset_index()
-        gdf[model_colname] = np.nan
-
-        for time in times:
-            df = data.query(f"{temporal_index}=={time}").reset_index(drop=True)
-
-            model = specification[method](
-                df[columns],
+        X = data[columns].to_numpy()
+        periods = data[temporal_index].to_numpy()
+        splits = {time: np.flatnonzero(periods == time) for time in times}
+        splits = {time: rows for time, rows in splits.items() if len(rows)}
+
+        # fit each period in parallel, then scatter all labels back at once
+        fitted = Parallel(n_jobs=n_jobs, backend=backend)(
+            delayed(specification[method])(
+                X[rows],
                 n_clusters=n_clusters,
                 best_model=best_model,
                 verbose=verbose,
                 **cluster_kwargs,
             )
+            for rows in splits.values()
+        )
+        labels = np.full(len(data), np.nan)
+        for rows, model in zip(splits.values(), fitted, strict=True):
+            labels[rows] = model.labels_
+        clusters = pd.DataFrame(
+            {model_colname: labels},
+            index=pd.MultiIndex.from_frame(data[[temporal_index, unit_index]]),
+        )
+        unique = ~clusters.index.duplicated(keep="first")
+        gdf[model_colname] = clusters[unique][model_colname].reindex(gdf.index)
 
-            labels = pd.Series(model.labels_, name=model_colname)
-            clusters = pd.DataFrame(
-                {
-                    model_colname: labels,
-                    temporal_index: df[temporal_index],
-                    unit_index: df[unit_index],
-                }
-            )
-            clusters = clusters.drop_duplicates(subset=[unit_index])
-            clusters.set_index([temporal_index, unit_index], inplace=True)
-            gdf.update(clusters)
-            clusters = gpd.GeoDataFrame(
-                clusters.join(gdf.drop(columns=[model_colname]), how="left"),
+        for (time, rows), model in zip(splits.items(), fitted, strict=True):
+            period = clusters.iloc[rows][unique[rows]]
+            period = gpd.GeoDataFrame(
+                period.join(gdf.drop(columns=[model_colname]), how="left"),
                 crs=gdf.crs,
             ).reset_index()
             results = ModelResults(
-                df=clusters,
+                df=period,
                 columns=columns,
                 labels=model.labels_,
                 instance=model,
@@ -252,6 +579,7 @@ def cluster(
                 unit_index=unit_index,
                 scaler=scaler,
                 pooling=pooling,
+                X=X[rows][unique[rows]],
             )
             models[time] = results
         if return_model:
@@ -259,6 +587,426 @@ def cluster(
         return gdf.reset_index()
 
 
+def _cluster_labels(
+    gdf,
+    n_clusters,
+    method,
+    best_model,
+    columns,
+    verbose,
+    temporal_index,
+    unit_index,
+    scaler,
+    pooling,
+    random_state,
+    cluster_kwargs,
+    model_colname,
+    return_model,
+):
+    """Fit a cluster model on the feature columns alone and return only its labels.
+
+    See `cluster` for a description of the arguments. Geometries (if any) are never
+    copied; the ModelResults keeps a reference to `gdf` and joins them on demand.
+    """
+    keys = [temporal_index, unit_index]
+    raw = pd.DataFrame(gdf[keys + columns]).dropna(how="any", subset=columns)
+    raw = raw.reset_index(drop=True)
+    data = _scale_data(raw.set_index(keys)[columns], scaler, pooling)
+    geometry = gdf if isinstance(gdf, gpd.GeoDataFrame) else None
+
+    def fit(rows, **kwargs):
+        model = _cluster_methods[method](
+            data[columns].iloc[rows],
+            n_clusters=n_clusters,
+            best_model=best_model,
+            verbose=verbose,
+            **kwargs,
+            **cluster_kwargs,
+        )
+        frame = raw.iloc[rows].reset_index(drop=True)
+        frame[model_colname] = model.labels_
+        unique = ~frame.duplicated(subset=keys).to_numpy()
+        results = ModelResults(
+            df=frame[unique].reset_index(drop=True),
+            columns=columns,
+            labels=model.labels_,
+            instance=model,
+            W=None,
+            name=model_colname,
+            temporal_index=temporal_index,
+            unit_index=unit_index,
+            scaler=scaler,
+            pooling=pooling,
+            X=data.to_numpy()[rows][unique],
+            geometry=geometry,
+        )
+        return frame[unique], results
+
+    if pooling != "unique":
+        labels, models = fit(np.arange(len(raw)), random_state=random_state)
+    else:
+        models = _Map()
+        labels = []
+        periods = raw[temporal_index].to_numpy()
+        for time in pd.unique(periods):
+            frame, models[time] = fit(np.flatnonzero(periods == time))
+            labels.append(frame)
+        labels = pd.concat(labels)
+    labels = labels[keys + [model_colname]].reset_index(drop=True)
+
+    if return_model:
+        return labels, models
+    return labels
+
+
+def _fit_cluster_model(X, method, n_clusters, random_state, cluster_kwargs):
+    """Fit a single cluster model (used as a parallel worker)."""
+    return _cluster_methods[method](
+        X,
+        n_clusters=n_clusters,
+        best_model=False,
+        verbose=False,
+        random_state=random_state,
+        **cluster_kwargs,
+    )
+
+
+def cluster_many(
+    gdf,
+    methods=None,
+    n_clusters=6,
+    columns=None,
+    temporal_index="year",
+    unit_index="geoid",
+    scaler="std",
+    pooling="fixed",
+    random_state=None,
+    cluster_kwargs=None,
+    n_jobs=-1,
+    backend="loky",
+):
+    """Fit several cluster models to the same data for comparison.
+
+    The data are prepared and rescaled once, then every combination of method
+    and number of clusters is fit in parallel. All the resulting models share
+    a single feature matrix and hold only the features and labels; geometries
+    are joined from `gdf` when diagnostics or plots need them.
+
+    Parameters
+    ----------
+    gdf : geopandas.GeoDataFrame or pandas.DataFrame, required
+        long-form (geo)dataframe containing neighborhood attributes
+    methods : list of str, required
+        clustering algorithms to fit. Any of ['kmeans', 'ward',
+        'affinity_propagation', 'spectral','gaussian_mixture', 'hdbscan']
+    n_clusters : int or list of int, optional
+        the number(s) of clusters to model. The default is 6
+    columns : list-like, required
+        subset of columns on which to apply the clustering
+    temporal_index : str, required
+        which column on the dataframe defines time and or sequencing of the
+        long-form data. Default is "year"
+    unit_index : str, required
+        which column on the long-form dataframe identifies the stable units
+        over time. In a wide-form dataset, this would be the unique index
+    scaler : None or scaler from sklearn.preprocessing, optional
+        a scikit-learn preprocessing class that will be used to rescale the
+        data. Defaults to sklearn.preprocessing.StandardScaler
+    pooling : ["fixed", "pooled"], optional (default='fixed')
+        How to treat temporal data when applying scaling. Options include:
+
+        * fixed : scaling is fixed to each time period
+        * pooled : data are pooled across all time periods
+    random_state : int, RandomState instance or None, default=None
+        Pseudo-random number generator to control the starting state. Use an int for reproducible results across function calls.
+    cluster_kwargs: dict
+        additional keyword arguments passed to every clustering instance
+    n_jobs : int, optional
+        number of cores used to fit the models in parallel. If -1, all available
+        cores will be used, by default -1
+    backend : str, optional
+        computation backend passed to joblib. One of {'multiprocessing', 'loky',
+        'threading'}, by default "loky"
+
+    Returns
+    -------
+    dict
+        ModelResults keyed by model name (`{method}_{n_clusters}`), which is also
+        the name of the label column in each model's `df`
+    """
+    if not methods:
+        raise ValueError("You must provide a list of clustering methods")
+    for method in methods:
+        if method not in _cluster_methods:
+            raise ValueError(
+                f"`method` must be one of {list(_cluster_methods.keys())}"
+            )
+    if not columns:
+        raise ValueError("You must provide a subset of columns as input")
+    assert pooling in [
+        "fixed",
+        "pooled",
+    ], "`cluster_many` supports 'fixed' or 'pooled' pooling"
+    if scaler == "std":
+        scaler = StandardScaler()
+    if not cluster_kwargs:
+        cluster_kwargs = dict()
+    if np.ndim(n_clusters) == 0:
+        n_clusters = [n_clusters]
+
+    # prepare and scale the data once for every model
+    keys = [temporal_index, unit_index]
+    raw = pd.DataFrame(gdf[keys + columns]).dropna(how="any", subset=columns)
+    raw = raw.reset_index(drop=True)
+    X = _scale_data(raw.set_index(keys)[columns], scaler, pooling).to_numpy()
+    unique = ~raw.duplicated(subset=keys).to_numpy()
+    frame = raw[unique].reset_index(drop=True)
+    X_unique = X if unique.all() else X[unique]
+    geometry = gdf if isinstance(gdf, gpd.GeoDataFrame) else None
+
+    specs = [(method, k) for method in methods for k in n_clusters]
+    fitted = Parallel(n_jobs=n_jobs, backend=backend)(
+        delayed(_fit_cluster_model)(X, method, k, random_state, cluster_kwargs)
+        for method, k in tqdm(specs, total=len(specs))
+    )
+
+    models = _Map()
+    for (method, k), model in zip(specs, fitted, strict=True):
+        name = f"{method}_{k}"
+        models[name] = ModelResults(
+            df=frame.assign(**{name: model.labels_[unique]}),
+            columns=columns,
+            labels=model.labels_,
+            instance=model,
+            W=None,
+            name=name,
+            temporal_index=temporal_index,
+            unit_index=unit_index,
+            scaler=scaler,
+            pooling=pooling,
+            X=X_unique,
+            geometry=geometry,
+        )
+    return models
+
+
+def _iter_batches(source, columns, batch_size):
+    """Yield pandas DataFrames holding `columns` from a parquet or ibis source."""
+    if isinstance(source, (str, pathlib.Path, list, tuple)):
+        reader = ds.dataset(source, format="parquet").to_batches(
+            columns=columns, batch_size=batch_size
+        )
+    else:
+        # an ibis table expression, like those returned by DataStore with
+        # execute=False
+        reader = source.select(columns).to_pyarrow_batches(chunk_size=batch_size)
+    for batch in reader:
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+def _iter_feature_batches(source, columns, temporal_index, unit_index, batch_size):
+    """Yield (periods, units, features) for the complete rows of each batch."""
+    if not isinstance(source, dict):
+        source = {None: source}
+    for period, src in source.items():
+        cols = columns + [unit_index]
+        if period is None:
+            cols = cols + [temporal_index]
+        for batch in _iter_batches(src, cols, batch_size):
+            batch = batch.dropna(subset=columns)
+            if batch.empty:
+                # e.g. a row group with no complete observations
+                continue
+            if period is not None:
+                batch[temporal_index] = period
+            yield (
+                batch[temporal_index].to_numpy(),
+                batch[unit_index].to_numpy(),
+                batch[columns].to_numpy(dtype=float),
+            )
+
+
+def _streaming_moments(batches, pooling):
+    """Accumulate the mean and standard deviation of each column over batches.
+
+    Batches are combined with Chan's parallel update of the count, mean, and sum
+    of squared deviations. Columns that are (numerically) constant get a standard
+    deviation of 1, as in `_fit_standard_scaler`.
+
+    Parameters
+    ----------
+    batches : iterable
+        (periods, units, features) tuples as yielded by `_iter_feature_batches`
+    pooling : ["fixed", "pooled"]
+        whether to accumulate statistics for each time period or across all of them
+
+    Returns
+    -------
+    dict
+        (mean, std) arrays keyed by time period (or None if pooled)
+    """
+    n, mean, m2 = {}, {}, {}
+    for periods, _, X in batches:
+        if pooling == "pooled":
+            groups = [(None, X)]
+        else:
+            groups = [(key, X[periods == key]) for key in pd.unique(periods)]
+        for key, x in groups:
+            nb, mb = len(x), x.mean(axis=0)
+            m2b = ((x - mb) ** 2).sum(axis=0)
+            if key not in n:
+                n[key], mean[key], m2[key] = nb, mb, m2b
+                continue
+            total = n[key] + nb
+            delta = mb - mean[key]
+            mean[key] = mean[key] + delta * nb / total
+            m2[key] = m2[key] + m2b + delta**2 * n[key] * nb / total
+            n[key] = total
+    moments = dict()
+    for key in n:
+        std = _standard_scale(mean[key], m2[key] / n[key], n[key])
+        moments[key] = (mean[key], std)
+    return moments
+
+
+def cluster_streaming(
+    source,
+    n_clusters=6,
+    columns=None,
+    temporal_index="year",
+    unit_index="geoid",
+    scaler="std",
+    pooling="fixed",
+    batch_size=100000,
+    n_epochs=1,
+    random_state=None,
+    cluster_kwargs=None,
+    model_colname="kmeans",
+    return_model=False,
+):
+    """Create a kmeans geodemographic typology without loading the full dataset into memory.
+
+    The data are streamed from disk (or a DataStore query) three times: a first
+    pass accumulates the scaling statistics, a second pass fits a
+    `sklearn.cluster.MiniBatchKMeans` model one batch at a time with
+    `partial_fit`, and a third pass assigns each observation to a cluster. Only a
+    single batch of features is held in memory at once.
+
+    Parameters
+    ----------
+    source : str, list, ibis.Table, or dict
+        input data. Either path(s) to parquet file(s) or directories, or an ibis
+        table expression such as those returned by `geosnap.DataStore` methods with
+        `execute=False`. A dict mapping each time period to one of these sources
+        can be used when the inputs do not carry a `temporal_index` column (e.g.
+        one ACS vintage per file)
+    n_clusters : int, optional
+        the number of clusters to model. The default is 6
+    columns : list-like, required
+        subset of columns on which to apply the clustering
+    temporal_index : str, optional
+        which column defines time and or sequencing of the long-form data.
+        Default is "year"
+    unit_index : str, optional
+        which column identifies the stable units over time. Default is "geoid"
+    scaler : None, "std", or sklearn.preprocessing.StandardScaler, optional
+        whether to standardize the data before clustering. Because the scaling
+        statistics are accumulated in a streaming pass, only standardization is
+        supported; the `with_mean` and `with_std` settings of a StandardScaler
+        instance are honored. Defaults to "std"
+    pooling : ["fixed", "pooled"], optional (default='fixed')
+        How to treat temporal data when applying scaling. Options include:
+
+        * fixed : scaling is fixed to each time period
+        * pooled : data are pooled across all time periods
+    batch_size : int, optional
+        number of rows read from the source at a time, by default 100000
+    n_epochs : int, optional
+        number of passes over the data used to fit the model, by default 1
+    random_state : int, RandomState instance or None, default=None
+        Pseudo-random number generator to control the starting state. Use an int for reproducible results across function calls.
+    cluster_kwargs: dict
+        additional keyword arguments passed to `sklearn.cluster.MiniBatchKMeans`
+    model_colname : str
+        column name for storing cluster labels on the output dataframe. Default is
+        "kmeans"
+    return_model: bool
+        if True, return the fitted MiniBatchKMeans instance as well (default is False)
+
+    Returns
+    -------
+    labels : pandas.DataFrame
+        long-form dataframe with `temporal_index`, `unit_index`, and `model_colname`
+        columns holding the cluster label for each complete observation
+
+    model : sklearn.cluster.MiniBatchKMeans
+        the fitted model, returned if return_model is True
+    """
+    if not columns:
+        raise ValueError("You must provide a subset of columns as input")
+    assert pooling in ["fixed", "pooled"], "`pooling` must be 'fixed' or 'pooled'"
+    if scaler not in [None, "std"] and not isinstance(scaler, StandardScaler):
+        raise ValueError("only standardization is supported when streaming")
+    if not cluster_kwargs:
+        cluster_kwargs = dict()
+    columns = list(columns)
+
+    def batches():
+        return _iter_feature_batches(
+            source, columns, temporal_index, unit_index, batch_size
+        )
+
+    # first pass: scaling statistics
+    moments = None
+    if scaler is not None:
+        moments = _streaming_moments(batches(), pooling)
+        if isinstance(scaler, StandardScaler):
+            moments = {
+                key: (
+                    mean if scaler.with_mean else np.zeros_like(mean),
+                    std if scaler.with_std else np.ones_like(std),
+                )
+                for key, (mean, std) in moments.items()
+            }
+
+    def scale(periods, X):
+        if moments is None:
+            return X
+        if pooling == "pooled":
+            return (X - moments[None][0]) / moments[None][1]
+        out = np.empty_like(X)
+        for key in pd.unique(periods):
+            rows = periods == key
+            out[rows] = (X[rows] - moments[key][0]) / moments[key][1]
+        return out
+
+    # second pass: fit the model one batch at a time
+    model = MiniBatchKMeans(
+        n_clusters=n_clusters, random_state=random_state, **cluster_kwargs
+    )
+    for _ in range(n_epochs):
+        for periods, _, X in tqdm(batches(), desc="fitting"):
+            model.partial_fit(scale(periods, X))
+
+    # third pass: assign labels
+    labels = [
+        pd.DataFrame(
+            {
+                temporal_index: periods,
+                unit_index: units,
+                model_colname: model.predict(scale(periods, X)),
+            }
+        )
+        for periods, units, X in batches()
+    ]
+    labels = pd.concat(labels, ignore_index=True)
+
+    if return_model:
+        return labels, model
+    return labels
+
+
 def regionalize(
     gdf,
     n_clusters=6,
@@ -274,6 +1022,8 @@ def regionalize(
     region_kwargs=None,
     model_colname=None,
     return_model=False,
+    n_jobs=-1,
+    backend="loky",
 ):
     """Create a *spatial* geodemographic typology by running a cluster
     analysis on the metro area's neighborhood attributes and including a
@@ -285,10 +1035,11 @@ def regionalize(
         long-form geodataframe holding neighborhood attribute and geometry data.
     n_clusters : int
         the number of clusters to model. The default is 6).
-    spatial_weights : ['queen', 'rook'] or libpysal.weights.W object
+    spatial_weights : ['queen', 'rook'], libpysal.weights.W object, or libpysal.graph.Graph
         spatial weights matrix specification`. By default, geosnap will calculate Rook
         weights, but you can also pass a libpysal.weights.W object for more control
-        over the specification.
+        over the specification, or a precomputed graph indexed by `unit_index` (e.g.
+        from `DataStore.adjacency`), which is subset to the units in each period.
     method : str in ['ward_spatial', 'kmeans_spatial', 'spenc', 'skater', 'azp', 'max_p']
         the clustering algorithm used to identify neighborhood types
     columns : array-like
@@ -319,6 +1070,12 @@ def regionalize(
         named after the clustering method, the name will be incremented with a number
     return_model: bool
         If True, also retun a dictional of fitted classes from the regionalization provider
+    n_jobs : int, optional
+        number of cores used to build the weights and fit the model for each time
+        period in parallel. If -1, all available cores will be used, by default -1
+    backend : str, optional
+        computation backend passed to joblib. One of {'multiprocessing', 'loky',
+        'threading'}, by default "loky"
 
     Returns
     -------
@@ -349,14 +1106,7 @@ def regionalize(
     if not region_kwargs:
         region_kwargs = dict()
 
-    specification = {
-        "azp": azp,
-        "spenc": spenc,
-        "ward_spatial": ward_spatial,
-        "skater": skater,
-        "max_p": max_p,
-        "kmeans_spatial": kmeans_spatial,
-    }
+    specification = _region_methods
 
     if method not in specification:
         raise ValueError(f"`method` must be one of {specification.keys()}")
@@ -389,44 +1139,87 @@ def regionalize(
 
     contiguity_weights = {"queen": Queen, "rook": Rook}
 
-    W = contiguity_weights.get(spatial_weights, spatial_weights)
+    W = spatial_weights
+    if isinstance(spatial_weights, str):
+        W = contiguity_weights[spatial_weights]
 
     models = _Map()
-    clusters = []
-    gdf[model_colname] = np.nan
 
-    # loop over each time period, standardize the data and build a weights matrix
+    # standardize the data for each time period, then build the weights matrices
+    # and fit the models in parallel
+    frames = dict()
     for time in times:
         df = data.loc[time].dropna(how="any", subset=columns).reset_index()
         df[temporal_index] = time
 
         if scaler:
             df[columns] = scaler.fit_transform(df[columns].values)
-
-        w0 = W.from_dataframe(df, **weights_kwargs)
-        w0 = form_single_component(df, w0, linkage="single")
-
-        model = specification[method](
-            df,
+        frames[time] = df
+
+    # reuse cached (or precomputed) weights where possible; the rest are built by
+    # the workers and cached afterward
+    if isinstance(W, Graph):
+        keys = dict.fromkeys(frames)
+        cached = {
+            time: subset_graph(W, df[unit_index], index=df.index).to_W()
+            for time, df in frames.items()
+        }
+        joined = {
+            time: connected_weights(df, cached[time]) for time, df in frames.items()
+        }
+    else:
+        keys = {
+            time: _graph_key(df, _weights_kind(W), weights_kwargs, ids=df[unit_index])
+            for time, df in frames.items()
+        }
+        cached = {time: _cache_get(key, weights=True) for time, key in keys.items()}
+        joined = {
+            time: _cache_get(f"{key}-connected", weights=True)
+            for time, key in keys.items()
+        }
+    # geometries are only sent to the workers that need to build weights
+    fitted = Parallel(n_jobs=n_jobs, backend=backend)(
+        delayed(_regionalize_period)(
+            df if joined[time] is None else pd.DataFrame(df.drop(columns="geometry")),
+            W,
+            weights_kwargs,
+            w=cached[time],
+            w0=joined[time],
+            method=method,
             columns=columns,
-            w=w0,
             n_clusters=n_clusters,
             threshold_variable=threshold_variable,
             threshold=threshold,
-            **region_kwargs,
+            region_kwargs=region_kwargs,
         )
-
-        labels = pd.Series(model.labels_)
+        for time, df in frames.items()
+    )
+    for time, (_, w, w0) in zip(frames, fitted, strict=True):
+        if cached[time] is None:
+            _cache_put(keys[time], w, weights=True)
+        if keys[time] is not None and joined[time] is None:
+            _cache_put(f"{keys[time]}-connected", w0, weights=True)
+
+    period_clusters = dict()
+    period_X = dict()
+    for (time, df), (model, _, _) in zip(frames.items(), fitted, strict=True):
         clusters = pd.DataFrame(
             {
-                model_colname: labels,
+                model_colname: model.labels_,
                 temporal_index: df[temporal_index],
                 unit_index: df[unit_index],
             }
         )
-        clusters = clusters.drop_duplicates(subset=[unit_index])
-        clusters.set_index([temporal_index, unit_index], inplace=True)
-        gdf.update(clusters)
+        unique = ~clusters.duplicated(subset=[unit_index]).to_numpy()
+        period_clusters[time] = clusters[unique].set_index([temporal_index, unit_index])
+        # keep the (rescaled) features each period was fit on for the diagnostics
+        period_X[time] = df[columns].to_numpy(dtype=float)[unique]
+    labels = pd.concat(period_clusters.values())[model_colname]
+    gdf[model_colname] = labels.reindex(gdf.index).astype(float)
+
+    for (time, clusters), (model, _, w0) in zip(
+        period_clusters.items(), fitted, strict=True
+    ):
         clusters = gpd.GeoDataFrame(
             clusters.join(gdf.drop(columns=[model_colname]), how="left"), crs=gdf.crs
         ).reset_index()
@@ -442,6 +1235,7 @@ def regionalize(
             unit_index=unit_index,
             scaler=scaler,
             pooling=None,
+            X=np.nan_to_num(period_X[time]),
         )
         models[time] = results
 
@@ -464,6 +1258,10 @@ def find_k(
     min_k=2,
     max_k=10,
     return_table=False,
+    silhouette_estimator="auto",
+    n_jobs=-1,
+    backend="loky",
+    warm_start=False,
 ):
     """Brute-forse search through cluster fit metrics to determine the optimal number of `k` clusters
 
@@ -500,14 +1298,37 @@ def find_k(
     return_table : bool, optional
         if True, return the table of fit metrics for each combination
         of k and cluster method, by default False
+    silhouette_estimator : str, optional
+        estimator used for the silhouette score (see
+        `ModelResults.compute_silhouette_scores`). The default, "auto", uses the
+        exact silhouette for models with up to 10,000 observations and a sample
+        of 10,000 observations stratified by cluster ("sampled") for larger models
+    n_jobs : int, optional
+        number of cores used to fit the models for different values of k in
+        parallel. If -1, all available cores will be used, by default -1
+    backend : str, optional
+        computation backend passed to joblib. One of {'multiprocessing', 'loky',
+        'threading'}, by default "loky"
+    warm_start : bool, optional
+        if True, fit kmeans and gaussian_mixture models in sequence of increasing
+        k, initializing each model from the (k-1) solution instead of fitting
+        every k from scratch. This is typically much faster, but the solutions
+        (and therefore the fit metrics) can differ from those of independent
+        fits, so the default is False. Ward solutions are always computed by
+        cutting a single dendrogram at each k, which gives the same partitions
+        as fitting each k. Only the fit metrics are computed in parallel when the
+        solutions are fit in sequence
 
     Returns
     -------
     pandas.DataFrame
         if return_table==False (default), returns a pandas dataframe with a single column that holds
         the optimal number of clusters according to each fit metric (row index).
+        The silhouette estimator is recorded in the `silhouette_estimator` entry
+        of the dataframe's `attrs`.
 
-        if return_table==True, returns a table of fit coefficients for each k between min_k and max_k
+        if return_table==True, returns a table of fit coefficients for each k between min_k and max_k,
+        including the silhouette estimator used for each k
     """
     assert method != "affinity_propagation", (
         "Affinity propagation finds `k` endogenously, "
@@ -516,34 +1337,40 @@ def find_k(
         "change the `damping` and `preference` arguments"
     )
 
-    output = dict()
+    assert pooling != "unique", (
+        "`find_k` requires a single set of labels pooled over time. With "
+        "pooling='unique', run `find_k` on each time period separately"
+    )
+    if scaler == "std":
+        scaler = StandardScaler()
+    if not cluster_kwargs:
+        cluster_kwargs = dict()
+    if not columns:
+        raise ValueError("You must provide a subset of columns as input")
 
-    for i in tqdm(range(min_k, max_k + 1), total=max_k - min_k + 1):
-        #  create a model_results class
-        results = cluster(
-            gdf.copy(),
-            n_clusters=i,
-            method=method,
-            best_model=False,
-            columns=columns,
-            verbose=False,
-            temporal_index=temporal_index,
-            unit_index=unit_index,
-            scaler=scaler,
-            pooling=pooling,
-            random_state=random_state,
-            cluster_kwargs=cluster_kwargs,
-            return_model=True,
-        )[1]
+    # prepare and scale the data once; the fitted models differ only in k
+    data = gdf.set_index([temporal_index, unit_index])[columns].dropna(how="any")
+    X = _scale_data(data, scaler, pooling).to_numpy()
 
-        results = pd.Series(
-            {
-                "silhouette_score": results.silhouette_score,
-                "calinski_harabasz_score": results.calinski_harabasz_score,
-                "davies_bouldin_score": results.davies_bouldin_score,
-            },
+    ks = range(min_k, max_k + 1)
+    if method == "ward" or (warm_start and method in _cluster_paths):
+        # fit the whole sequence of solutions at once and score them in parallel
+        labels = _cluster_paths[method](
+            X, ks, random_state=random_state, **cluster_kwargs
+        )
+        fits = Parallel(n_jobs=n_jobs, backend=backend)(
+            delayed(_k_metrics)(X, labels[i], random_state, silhouette_estimator)
+            for i in tqdm(ks, total=len(ks))
+        )
+    else:
+        fits = Parallel(n_jobs=n_jobs, backend=backend)(
+            delayed(_fit_k_metrics)(
+                X, i, method, random_state, cluster_kwargs, silhouette_estimator
+            )
+            for i in tqdm(ks, total=len(ks))
         )
-        output[i] = results
+    estimators = {i: fit[0] for i, fit in zip(ks, fits, strict=True)}
+    output = {i: fit[1] for i, fit in zip(ks, fits, strict=True)}
     output = pd.DataFrame(output).T
     summary = output.agg(
         {
@@ -552,6 +1379,8 @@ def find_k(
             "davies_bouldin_score": "idxmin",  # min score is better here
         }
     ).to_frame(name="best_k")
+    output["silhouette_estimator"] = pd.Series(estimators)
+    summary.attrs["silhouette_estimator"] = ", ".join(sorted(set(estimators.values())))
 
     if return_table:
         return summary, output
@@ -571,6 +1400,8 @@ def find_region_k(
     min_k=2,
     max_k=10,
     return_table=False,
+    n_jobs=-1,
+    backend="loky",
 ):
     """Brute force through cluster fit metrics to determine the optimal number of `k` regions
 
@@ -582,10 +1413,11 @@ def find_region_k(
         the clustering method to use, by default None
     columns : list, optional
         a list of columns in `gdf` to use in the clustering algorithm, by default None
-    spatial_weights : ['queen', 'rook'] or libpysal.weights.W object
+    spatial_weights : ['queen', 'rook'], libpysal.weights.W object, or libpysal.graph.Graph
         spatial weights matrix specification`. By default, geosnap will calculate Rook
         weights, but you can also pass a libpysal.weights.W object for more control
-        over the specification.
+        over the specification, or a precomputed graph indexed by `unit_index` (e.g.
+        from `DataStore.adjacency`), which is subset to the units in each period.
     temporal_index : str, optional
         column that uniquely identifies time periods, by default "year"
     unit_index : str, optional
@@ -600,6 +1432,13 @@ def find_region_k(
     return_table : bool, optional
         if True, return the table of fit metrics for each combination
         of k and cluster method, by default False
+    n_jobs : int, optional
+        number of cores used to fit the regionalizations for each combination of k
+        and time period in parallel. If -1, all available cores will be used,
+        by default -1
+    backend : str, optional
+        computation backend passed to joblib. One of {'multiprocessing', 'loky',
+        'threading'}, by default "loky"
 
     Returns
     -------
@@ -610,50 +1449,54 @@ def find_region_k(
         if return_table==True, also returns a table of fit coefficients for each k between min_k and max_k
     """
 
-    output = list()
-
-    for i in tqdm(range(min_k, max_k + 1), total=max_k - min_k + 1):
-        #  create a model_results class
-        _, results = regionalize(
-            gdf.copy(),
+    if method not in _region_methods:
+        raise ValueError(f"`method` must be one of {_region_methods.keys()}")
+    if not columns:
+        raise ValueError("You must provide a subset of columns as input")
+    if scaler == "std":
+        scaler = StandardScaler()
+    if not weights_kwargs:
+        weights_kwargs = {}
+    region_kwargs = dict(region_kwargs) if region_kwargs else dict()
+    W = spatial_weights
+    if isinstance(spatial_weights, str):
+        W = {"queen": Queen, "rook": Rook}[spatial_weights]
+    threshold_variable = region_kwargs.pop("threshold_variable", "count")
+    threshold = region_kwargs.pop("threshold", 10)
+
+    # scale the data and build the weights for each period once, then share them
+    # across every k
+    allcols = columns + [gdf.geometry.name]
+    if threshold_variable != "count":
+        allcols = allcols + [threshold_variable]
+    data = gdf.set_index([temporal_index, unit_index])[allcols]
+    periods = dict()
+    for time in data.index.get_level_values(0).unique():
+        df = data.loc[time].dropna(how="any", subset=columns).reset_index()
+        w0 = _region_weights(df, W, weights_kwargs, ids=df[unit_index])
+        df = pd.DataFrame(df.drop(columns=gdf.geometry.name))
+        if scaler:
+            df[columns] = scaler.fit_transform(df[columns].to_numpy(dtype=float))
+        # score the fits on the features they were fit on, as ModelResults does
+        X = np.nan_to_num(df[columns].to_numpy(dtype=float))
+        periods[time] = (df, X, w0)
+
+    tasks = [(i, time) for i in range(min_k, max_k + 1) for time in periods]
+    fits = Parallel(n_jobs=n_jobs, backend=backend)(
+        delayed(_fit_region_k_metrics)(
+            *periods[time],
             n_clusters=i,
             method=method,
             columns=columns,
-            spatial_weights=spatial_weights,
-            temporal_index=temporal_index,
-            unit_index=unit_index,
-            scaler=scaler,
-            weights_kwargs=weights_kwargs,
+            threshold_variable=threshold_variable,
+            threshold=threshold,
             region_kwargs=region_kwargs,
-            return_model=True,
         )
-
-        times = list()
-        for time_period in results:
-
-            res = pd.Series(
-                {
-                    "silhouette_score": results[time_period].silhouette_score,
-                    "calinski_harabasz_score": results[
-                        time_period
-                    ].calinski_harabasz_score,
-                    "davies_bouldin_score": results[time_period].davies_bouldin_score,
-                    "path_silhouette": results[
-                        time_period
-                    ].path_silhouette.path_silhouette.mean(),
-                    "boundary_silhouette": results[time_period]
-                    .boundary_silhouette[
-                        results[time_period].boundary_silhouette.boundary_silhouette
-                        != 0
-                    ]
-                    .boundary_silhouette.mean(),  # average of non-zero boundary-silhouettes,
-                    "time_period": time_period,
-                    "k": i,
-                },
-            )
-            times.append(pd.DataFrame(res).T)
-        output.append(pd.concat(times).set_index("k"))
-    output = pd.concat(output)
+        for i, time in tqdm(tasks, total=len(tasks))
+    )
+    output = pd.DataFrame(fits)
+    output["time_period"] = [time for _, time in tasks]
+    output.index = pd.Index([i for i, _ in tasks], name="k")
 
     summary = output.groupby("time_period").agg(
         {
@@ -1 +1 @@
-from .harmonize import harmonize
+from .harmonize import estimate_harmonize_cost, harmonize
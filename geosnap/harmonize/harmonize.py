@@ -1,14 +1,308 @@
 """Use spatial interpolation to standardize neighborhood boundaries over time."""
 
+import hashlib
 import warnings
+from collections import OrderedDict
+from time import perf_counter
 
 import geopandas as gpd
+import numpy as np
 import pandas as pd
+import shapely
+from scipy.sparse import csr_matrix
 from tobler.area_weighted import area_interpolate
+from tobler.area_weighted.area_interpolate import _area_tables_binning
 from tobler.dasymetric import masked_area_interpolate
 from tobler.util.util import _check_presence_of_crs
 from tqdm.auto import tqdm
 
+# area allocation tables are expensive to build but depend only on the source and
+# target geometries, so keep the most recent ones around for reuse across periods
+# that share a geometry vintage (e.g. consecutive ACS releases) and across calls
+_AREA_TABLES = OrderedDict()
+_AREA_TABLES_MAXSIZE = 16
+
+
+def _geometry_key(gdf):
+    """Hash the geometries (and crs) of a geodataframe into a cache key."""
+    hashes = pd.util.hash_pandas_object(gdf.geometry.to_wkb(), index=False).values
+    key = hashlib.sha1(hashes.tobytes())
+    key.update(str(gdf.crs).encode())
+    return key.hexdigest()
+
+
+def _area_table(source_df, target_df):
+    """Build (or fetch from the cache) the source-target area allocation table."""
+    key = (_geometry_key(source_df), _geometry_key(target_df))
+    if key in _AREA_TABLES:
+        _AREA_TABLES.move_to_end(key)
+        return _AREA_TABLES[key]
+    table = _area_tables_binning(source_df, target_df, spatial_index="auto")
+    _AREA_TABLES[key] = table
+    if len(_AREA_TABLES) > _AREA_TABLES_MAXSIZE:
+        _AREA_TABLES.popitem(last=False)
+    return table
+
+
+def _interpolate(
+    source_df,
+    target_df,
+    table,
+    extensive_variables=None,
+    intensive_variables=None,
+    allocate_total=True,
+    verbose=False,
+):
+    """Area-weighted interpolation through a precomputed area allocation table.
+
+    Parameters
+    ----------
+    source_df : geopandas.GeoDataFrame
+        source geodataframe whose rows match the rows of `table`
+    target_df : geopandas.GeoDataFrame
+        target geodataframe whose rows match the columns of `table`
+    table : scipy.sparse.csr_matrix
+        (n_source, n_target) matrix of intersection areas
+    extensive_variables : list
+        columns on `source_df` to interpolate as extensive variables
+    intensive_variables : list
+        columns on `source_df` to interpolate as intensive variables
+    allocate_total : bool
+        whether the full value of each source polygon should be allocated
+    verbose : bool
+        whether to warn when NaN or inf values are replaced with 0
+
+    Returns
+    -------
+    geopandas.GeoDataFrame
+        interpolated values in the target geometries, from
+        `tobler.area_weighted.area_interpolate`
+    """
+    variables = (extensive_variables or []) + (intensive_variables or [])
+    values = source_df[variables].to_numpy(dtype=float)
+    invalid = ~np.isfinite(values)
+    if invalid.any():
+        # replace missing values up front (as tobler would) so the values handed to
+        # tobler are never modified in place
+        if verbose:
+            for col in np.asarray(variables)[invalid.any(axis=0)]:
+                warnings.warn(
+                    f"nan or inf values in variable: {col}, replacing with 0",
+                    stacklevel=2,
+                )
+        values = np.where(invalid, 0, values)
+    source = source_df[[source_df.geometry.name]].copy()
+    source[variables] = values
+    with warnings.catch_warnings():
+        if not verbose:
+            # tobler's warnings are superfluous most of the time
+            warnings.simplefilter("ignore")
+        return area_interpolate(
+            source,
+            target_df,
+            extensive_variables=extensive_variables,
+            intensive_variables=intensive_variables,
+            table=table,
+            allocate_total=allocate_total,
+        )
+
+
+def _storage_dtype(dtype):
+    """Return the numpy float dtype that stores the values of an output dtype."""
+    dtype = pd.api.types.pandas_dtype(dtype)
+    dtype = getattr(dtype, "numpy_dtype", dtype)  # nullable and sparse dtypes
+    if dtype == np.float32:
+        return np.dtype(np.float32)
+    return np.dtype(np.float64)
+
+
+def _resolve_target(dfs, target_year, target_gdf, temporal_index):
+    """Return the target geodataframe and the time periods that must be converted."""
+    times = dfs[temporal_index].unique().tolist()
+    if target_gdf is not None:
+        target_df = target_gdf.copy()
+    else:
+        times.remove(target_year)
+        target_df = dfs[dfs[temporal_index] == target_year].copy()
+    return target_df, times
+
+
+def estimate_harmonize_cost(
+    gdf,
+    target_year=None,
+    target_gdf=None,
+    weights_method="area",
+    extensive_variables=None,
+    intensive_variables=None,
+    allocate_total=True,
+    temporal_index="year",
+    unit_index=None,
+    sample_size=500,
+    random_state=None,
+    dtype="float64",
+):
+    """Estimate the cost of an area-weighted `harmonize` call without running it.
+
+    For each time period that would be converted, the source and target
+    geometries are joined on their bounding boxes to count the candidate
+    source-target pairs (an upper bound on the number of intersections that
+    must be computed). The per-pair cost of the overlay is calibrated by
+    intersecting a random sample of candidate pairs, and the cost of the
+    aggregation is measured by interpolating the variables through a table with
+    an entry for every candidate pair. The peak memory of the interpolation is
+    estimated from the geometry sizes and pair counts.
+
+    Only the area-weighted interpolation is modeled. With
+    `weights_method="dasymetric"`, the cost of reading the raster and masking
+    the source geometries is not included, so the estimates are lower bounds.
+
+    Parameters
+    ----------
+    gdf : geopandas.GeoDataFrame
+        Long-form geodataframe with a column that holds unique time periods
+        represented by `temporal_index`
+    target_year : string
+        The target time period whose boundaries form the target (Optional).
+    target_gdf: geopandas.GeoDataFrame
+        A geodataframe whose boundaries are the interpolation target for all time
+        periods (Optional).
+    weights_method : str, optional
+        the interpolation method that would be used (see `harmonize`), by default
+        "area". A warning is raised for "dasymetric", whose estimates are lower
+        bounds
+    extensive_variables : list
+        The names of extensive variables that would be harmonized
+    intensive_variables : list
+        The names of intensive variables that would be harmonized
+    allocate_total : bool, optional
+        whether the full value of each source polygon would be allocated (see
+        `harmonize`), by default True
+    temporal_index : str, optional
+        the column on the geodataframe that identifies unique time periods,
+        by default "year"
+    unit_index : str, optional
+        the column on the geodataframe that identifies unique units in the timeseries.
+    sample_size : int, optional
+        number of candidate pairs per period used to calibrate the runtime
+        estimate, by default 500
+    random_state : int, optional
+        seed used to draw the calibration sample
+    dtype : str or numpy.dtype, optional
+        precision of the interpolated output (see `harmonize`), by default "float64"
+
+    Returns
+    -------
+    pandas.DataFrame
+        dataframe indexed by time period with the number of source and target
+        units, the number of candidate pairs from the bounding-box join, the
+        estimated peak memory (in MB), and the estimated runtime (in seconds) of
+        the overlay, the aggregation and the interpolation as a whole for each
+        period.
+    """
+    assert target_year or isinstance(
+        target_gdf, gpd.GeoDataFrame
+    ), "must provide either a target year or a target geodataframe"
+    if weights_method not in ["area", "dasymetric"]:
+        raise ValueError('weights_method must of one of ["area", "dasymetric"]')
+    if weights_method == "dasymetric":
+        warnings.warn(
+            "the cost of dasymetric masking is not modeled, so the estimates only "
+            "cover the area-weighted interpolation and are lower bounds",
+            stacklevel=2,
+        )
+    _check_presence_of_crs(gdf)
+    rng = np.random.default_rng(random_state)
+    n_variables = len(extensive_variables or []) + len(intensive_variables or [])
+    itemsize = _storage_dtype(dtype).itemsize
+
+    dfs = gdf.set_index(unit_index) if unit_index is not None else gdf
+    target_df, times = _resolve_target(dfs, target_year, target_gdf, temporal_index)
+    target_geoms = target_df.geometry.values
+    target_coords = shapely.get_num_coordinates(target_geoms)
+
+    rows = []
+    for time in times:
+        source_df = dfs[dfs[temporal_index] == time]
+        source_geoms = source_df.geometry.values
+        source_coords = shapely.get_num_coordinates(source_geoms)
+
+        tic = perf_counter()
+        # a query without a predicate returns every pair with intersecting bboxes
+        ids_src, ids_tgt = target_df.sindex.query(source_geoms)
+        query_time = perf_counter() - tic
+        n_pairs = len(ids_src)
+
+        per_pair = 0.0
+        if n_pairs:
+            sample = rng.choice(n_pairs, size=min(sample_size, n_pairs), replace=False)
+            tic = perf_counter()
+            shapely.area(
+                shapely.intersection(
+                    source_geoms[ids_src[sample]], target_geoms[ids_tgt[sample]]
+                )
+            )
+            per_pair = (perf_counter() - tic) / len(sample)
+
+        aggregation = 0.0
+        if n_pairs and n_variables:
+            # time the interpolation through a table with the sparsity of the
+            # candidate pairs (the true table can only be sparser)
+            table = csr_matrix(
+                (np.ones(n_pairs), (ids_src, ids_tgt)),
+                shape=(len(source_geoms), len(target_geoms)),
+            )
+            tic = perf_counter()
+            _interpolate(
+                source_df,
+                target_df,
+                table,
+                extensive_variables=extensive_variables,
+                intensive_variables=intensive_variables,
+                allocate_total=allocate_total,
+            )
+            aggregation = perf_counter() - tic
+
+        # 16 bytes per coordinate pair for the geometry copies made during the
+        # overlay, plus the intersection geometries of all candidate pairs, the
+        # sparse area table (float32 data and int64 coordinates) and the output,
+        # which tobler interpolates in float64 before it is cast to `dtype`
+        geometry_bytes = 16 * (source_coords.sum() + target_coords.sum())
+        intersection_bytes = 16 * (
+            source_coords[ids_src].sum() + target_coords[ids_tgt].sum()
+        )
+        table_bytes = 20 * n_pairs
+        output_bytes = (8 + itemsize) * len(target_geoms) * (n_variables + 1)
+        memory = geometry_bytes + intersection_bytes + table_bytes + output_bytes
+
+        rows.append(
+            {
+                temporal_index: time,
+                "n_source": len(source_geoms),
+                "n_target": len(target_geoms),
+                "n_candidate_pairs": n_pairs,
+                "est_memory_mb": memory / 1e6,
+                "est_overlay_seconds": query_time + per_pair * n_pairs,
+                "est_aggregation_seconds": aggregation,
+                "est_seconds": query_time + per_pair * n_pairs + aggregation,
+            }
+        )
+
+    return pd.DataFrame(rows).set_index(temporal_index)
+
+
+def _set_output_dtypes(df, extensive_variables, intensive_variables, dtype, sparse):
+    """Cast harmonized variables to `dtype`, storing mostly-zero counts as sparse."""
+    df[extensive_variables + intensive_variables] = df[
+        extensive_variables + intensive_variables
+    ].astype(dtype)
+    if sparse is not None:
+        for col in extensive_variables:
+            if (df[col] == 0).mean() >= sparse:
+                df[col] = df[col].astype(
+                    pd.SparseDtype(_storage_dtype(dtype), fill_value=0)
+                )
+    return df
+
 
 def harmonize(
     gdf,
@@ -23,6 +317,11 @@ def harmonize(
     temporal_index="year",
     unit_index=None,
     verbose=False,
+    append_to=None,
+    dry_run=False,
+    return_profile=False,
+    dtype="float64",
+    sparse_threshold=None,
 ):
     r"""
     Use spatial interpolation to standardize neighborhood boundaries over time.
@@ -79,7 +378,42 @@ def harmonize(
     verbose: bool
         whether to print warnings (usually NaN replacement warnings) from tobler
         default is False
-
+    append_to : geopandas.GeoDataFrame, optional
+        an existing harmonized geodataframe (i.e. the output of a previous call to
+        `harmonize`). If passed, only the time periods in `gdf` that are not already
+        present in `append_to` are interpolated (into the boundaries of `append_to`)
+        and the result is appended to `append_to`, so that adding a new release of
+        data does not require harmonizing the full history again. When using
+        `append_to`, `target_year` and `target_gdf` should not be given, and the
+        appended periods take on the dtypes of `append_to`.
+    dry_run : bool
+        if True, do not interpolate any data. Instead, return the per-period cost
+        estimate from `estimate_harmonize_cost`. Default is False
+    return_profile : bool
+        if True, also return a dataframe with the time (in seconds) spent in each
+        stage of the interpolation for each time period: the overlay that builds
+        the area allocation table, and the aggregation, in which tobler builds
+        the weights from the table and interpolates the variables. Default is
+        False
+    dtype : str or numpy.dtype
+        dtype of the harmonized variables. Passing "float32" (or the nullable
+        "Float32") halves the memory of the output. The dtype applies only to the
+        output: tobler interpolates each period in float64, and the estimates are
+        cast to `dtype` as each period is finished. Default is "float64"
+    sparse_threshold : float, optional
+        if given, extensive variables whose share of zeros in the harmonized data
+        is at least `sparse_threshold` (e.g. 0.9) are stored as pandas sparse
+        columns (with `dtype` values and a fill value of 0). Default is None
+
+    Returns
+    -------
+    geopandas.GeoDataFrame
+        long-form geodataframe with all time periods expressed in the target
+        boundaries
+    pandas.DataFrame
+        (only returned if `return_profile` is True) per-period stage timings.
+        With the dasymetric method the stages are not separable, so only the
+        total is recorded
 
     Notes
     -----
@@ -118,6 +452,17 @@ def harmonize(
         raise ValueError(
             "Either a target_year or a target_gdf may be specified, but not both"
         )
+    if append_to is not None:
+        if target_year or target_gdf is not None:
+            raise ValueError(
+                "When passing `append_to`, the target boundaries are taken from the "
+                "existing harmonized geodataframe, so neither a target_year nor a "
+                "target_gdf may be specified"
+            )
+        # the target units are the (unique) units in the existing harmonized data
+        target_gdf = append_to[~append_to.index.duplicated(keep="first")][
+            [append_to.geometry.name]
+        ]
     assert target_year or isinstance(
         target_gdf, gpd.GeoDataFrame
     ), "must provide either a target year or a target geodataframe"
@@ -131,16 +476,35 @@ def harmonize(
     dfs = gdf.copy()
     times = dfs[temporal_index].unique().tolist()
     interpolated_dfs = []
+    profile = []
 
     if unit_index is not None:
         dfs = dfs.set_index(unit_index)
 
-    if target_gdf is not None:
-        target_df = target_gdf
+    if append_to is not None:
+        # only interpolate the periods that haven't been harmonized already
+        existing = append_to[temporal_index].unique().tolist()
+        times = [t for t in times if t not in existing]
+
+    if dry_run:
+        return estimate_harmonize_cost(
+            dfs[dfs[temporal_index].isin(times + [target_year])],
+            target_year=target_year,
+            target_gdf=target_gdf,
+            weights_method=weights_method,
+            extensive_variables=extensive_variables,
+            intensive_variables=intensive_variables,
+            allocate_total=allocate_total,
+            temporal_index=temporal_index,
+            dtype=dtype,
+        )
 
-    elif target_year:
-        times.remove(target_year)
-        target_df = dfs[dfs[temporal_index] == target_year]
+    target_df, times = _resolve_target(
+        dfs[dfs[temporal_index].isin(times + [target_year])],
+        target_year,
+        target_gdf,
+        temporal_index,
+    )
 
     unit_index = target_df.index.name if target_df.index.name else "id"
     target_df[unit_index] = target_df.index.values
@@ -160,28 +524,33 @@ def harmonize(
             source_df = dfs[dfs[temporal_index] == i]
 
             if weights_method == "area":
-                if verbose:
-                    interpolation = area_interpolate(
-                        source_df,
-                        target_df.copy(),
-                        extensive_variables=extensive_variables,
-                        intensive_variables=intensive_variables,
-                        allocate_total=allocate_total,
-                    )
-                else:
-                    # if there are NaNs, tobler will raise lots of warnings, that it's filling
-                    # with implicit 0s. Those warnings are superfluous most of the time
-                    with warnings.catch_warnings():
-                        warnings.simplefilter("ignore")
-                        interpolation = area_interpolate(
-                            source_df,
-                            target_df.copy(),
-                            extensive_variables=extensive_variables,
-                            intensive_variables=intensive_variables,
-                            allocate_total=allocate_total,
-                        )
+                tic = perf_counter()
+                table = _area_table(source_df, target_df)
+                overlay = perf_counter() - tic
+
+                tic = perf_counter()
+                interpolation = _interpolate(
+                    source_df,
+                    target_df,
+                    table,
+                    extensive_variables=extensive_variables,
+                    intensive_variables=intensive_variables,
+                    allocate_total=allocate_total,
+                    verbose=verbose,
+                )
+                aggregation = perf_counter() - tic
+                profile.append(
+                    {
+                        temporal_index: i,
+                        "n_pairs": table.nnz,
+                        "overlay": overlay,
+                        "aggregation": aggregation,
+                        "total": overlay + aggregation,
+                    }
+                )
 
             elif weights_method == "dasymetric":
+                tic = perf_counter()
                 try:
                     if verbose:
                         interpolation = masked_area_interpolate(
@@ -212,9 +581,13 @@ def harmonize(
                         "methods. You must provide a raster file and indicate which pixel "
                         "values contain developed land"
                     )
+                profile.append({temporal_index: i, "total": perf_counter() - tic})
             else:
                 raise ValueError('weights_method must of one of ["area", "dasymetric"]')
 
+            # only one period is held in float64 at a time
+            variables = (extensive_variables or []) + (intensive_variables or [])
+            interpolation[variables] = interpolation[variables].astype(dtype)
             interpolation[temporal_index] = i
             interpolation[unit_index] = target_df[unit_index].values
             interpolation = interpolation.set_index(unit_index)
@@ -226,6 +599,34 @@ def harmonize(
     if target_year is not None:
         interpolated_dfs.append(target_df[allcols].set_index(unit_index))
 
+    profile = pd.DataFrame(
+        profile,
+        columns=[temporal_index, "n_pairs", "overlay", "aggregation", "total"],
+    ).set_index(temporal_index)
+
+    if append_to is not None:
+        if not interpolated_dfs:
+            if return_profile:
+                return append_to.copy(), profile
+            return append_to.copy()
+        new_df = pd.concat(interpolated_dfs)
+        # keep the dtypes (and index name) of the existing harmonized data
+        shared = [col for col in append_to.columns if col in new_df.columns]
+        new_df = new_df.astype(append_to[shared].dtypes.to_dict())
+        new_df.index.name = append_to.index.name
+        interpolated_dfs = [append_to, new_df.dropna(how="all")]
+
     harmonized_df = gpd.GeoDataFrame(pd.concat(interpolated_dfs), crs=crs)
+    harmonized_df = harmonized_df.dropna(how="all")
+    if append_to is None:
+        harmonized_df = _set_output_dtypes(
+            harmonized_df,
+            extensive_variables or [],
+            intensive_variables or [],
+            dtype,
+            sparse_threshold,
+        )
 
-    return harmonized_df.dropna(how="all")
+    if return_profile:
+        return harmonized_df, profile
+    return harmonized_df
@@ -6,6 +6,7 @@ from .storage import (
     _fipstable,
     _from_db,
     store_acs,
+    store_adjacency,
     store_blocks_2000,
     store_blocks_2010,
     store_blocks_2020,
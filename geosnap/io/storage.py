@@ -167,6 +167,67 @@ def store_blocks_2020(data_dir="auto"):
     quilt3.Package.install("census/blocks_2020", "s3://spatial-ucr", dest=pth)
 
 
+def store_adjacency(
+    vintages=(2000, 2010, 2020),
+    levels=("tract", "bg"),
+    kinds=("queen", "rook"),
+    data_dir="auto",
+    datastore=None,
+):
+    """Compute national contiguity graphs for census geographies and save them locally.
+
+    Tract geometries come from the cartographic tract boundaries and blockgroup
+    geometries from the ACS (2019 release for 2010 blockgroups and 2021 for 2020
+    blockgroups; 2000 blockgroups are not available). The graphs are stored as
+    sparse adjacency tables and can be read with `geosnap.DataStore.adjacency`.
+
+    Parameters
+    ----------
+    vintages : list, optional
+        census vintages of the geographic units, by default (2000, 2010, 2020)
+    levels : list, optional
+        geographic levels, any of {"tract", "bg"}, by default ("tract", "bg")
+    kinds : list, optional
+        contiguity types, any of {"queen", "rook"}, by default ("queen", "rook")
+    datastore : geosnap.DataStore, optional
+        datastore from which to read the geometries. If None, a DataStore is
+        created for `data_dir`
+
+    Returns
+    -------
+    None
+        Data will be available via `geosnap.DataStore.adjacency`
+
+    """
+    from libpysal.graph import Graph
+
+    from .._data import DataStore
+
+    data_dir = _make_data_dir(data_dir)
+    if datastore is None:
+        datastore = DataStore(data_dir)
+    pth = pathlib.Path(data_dir, "adjacency")
+    pathlib.Path(pth).mkdir(parents=True, exist_ok=True)
+
+    sources = {
+        ("tract", 2000): lambda: datastore.tracts_2000(),
+        ("tract", 2010): lambda: datastore.tracts_2010(),
+        ("tract", 2020): lambda: datastore.tracts_2020(),
+        ("bg", 2010): lambda: datastore.acs(year=2019, level="bg"),
+        ("bg", 2020): lambda: datastore.acs(year=2021, level="bg"),
+    }
+    for level in levels:
+        for vintage in vintages:
+            if (level, vintage) not in sources:
+                warn(f"No {level} geometries are available for {vintage}; skipping")
+                continue
+            gdf = sources[(level, vintage)]()[["geoid", "geometry"]]
+            gdf = gpd.GeoDataFrame(gdf, crs=4326).set_index("geoid")
+            for kind in kinds:
+                g = Graph.build_contiguity(gdf, rook=kind == "rook")
+                g.to_parquet(pathlib.Path(pth, f"{level}_{vintage}_{kind}.parquet"))
+
+
 def store_ejscreen(years="all", data_dir="auto"):
     """Save EPA EJScreen data to the local geosnap storage.
        Each year is about 1GB.
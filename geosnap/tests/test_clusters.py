@@ -1,8 +1,9 @@
 import numpy as np
+import pandas as pd
 from numpy.testing import assert_array_equal
 
 from geosnap import DataStore
-from geosnap.analyze import cluster, regionalize
+from geosnap.analyze import cluster, cluster_many, regionalize
 from geosnap.io import get_census
 
 reno = get_census(msa_fips="39900", datastore=DataStore())
@@ -51,8 +52,10 @@ def test_aff_prop():
 
 def test_hdbscan():
 
-    r = cluster(reno, columns=columns, method="hdbscan")
+    r, model = cluster(reno, columns=columns, method="hdbscan", return_model=True)
     assert len(r.hdbscan.unique()) >= 4
+    # noise is not a cluster
+    assert -1 not in model.centroids.index
 
 
 def test_ward_pooling_unique():
@@ -64,7 +67,16 @@ def test_ward_pooling_unique():
         model_colname="ward_unique",
     )
     assert(r.ward_unique.dropna().astype(int).sum()==446)
-    
+
+
+def test_ward_pooling_unique_serial():
+    kwargs = dict(
+        columns=columns, method="ward", pooling="unique", model_colname="ward_unique"
+    )
+    parallel = cluster(reno, **kwargs)
+    serial = cluster(reno, n_jobs=1, **kwargs)
+    assert_array_equal(serial.ward_unique.values, parallel.ward_unique.values)
+
 
 # Spatial Clusters
 
@@ -102,6 +114,28 @@ def test_ward_spatial():
     assert len(r.ward_spatial.unique()) == 8
 
 
+def test_regionalize_scaled_features():
+    from sklearn.preprocessing import StandardScaler
+
+    _, models = regionalize(
+        reno, columns=columns, method="ward_spatial", n_clusters=7, return_model=True
+    )
+    for model in models.values():
+        # the diagnostics use the features each period was fit on
+        np.testing.assert_array_almost_equal(
+            model.X, StandardScaler().fit_transform(model.df[columns].values)
+        )
+
+
+def test_ward_spatial_serial():
+
+    r = regionalize(reno, columns=columns, method="ward_spatial", n_clusters=7)
+    serial = regionalize(
+        reno, columns=columns, method="ward_spatial", n_clusters=7, n_jobs=1
+    )
+    assert_array_equal(r.ward_spatial.values, serial.ward_spatial.values)
+
+
 def test_skater():
 
     r = regionalize(reno, columns=columns, method="skater", n_clusters=10)
@@ -154,3 +188,195 @@ def test_random_state():
     card2.sort()
     # test that the cardinalities are identical
     np.testing.assert_array_equal(card1, card2)
+
+
+def test_scale_by_period():
+    from sklearn.preprocessing import StandardScaler
+
+    from geosnap.analyze.geodemo import _fit_by_period, _scale_by_period
+
+    data = reno.set_index(["year", "geoid"])[columns].dropna()
+    # a constant feature is left unscaled, as sklearn does
+    data = data.assign(constant=0.1)
+    scaled = _scale_by_period(data, StandardScaler())
+    scalers = _fit_by_period(data, StandardScaler())
+    for year in data.index.get_level_values(0).unique():
+        fitted = StandardScaler().fit(data.loc[year].values)
+        np.testing.assert_array_almost_equal(
+            scaled.loc[year].values, fitted.transform(data.loc[year].values)
+        )
+        np.testing.assert_array_almost_equal(scalers[year].mean_, fitted.mean_)
+        np.testing.assert_array_almost_equal(scalers[year].scale_, fitted.scale_)
+
+
+def test_cluster_streaming(tmp_path):
+    from geosnap.analyze import cluster_streaming
+
+    path = tmp_path / "reno.parquet"
+    reno.drop(columns="geometry").to_parquet(path)
+    labels = cluster_streaming(
+        str(path), n_clusters=6, columns=columns, batch_size=100, random_state=0
+    )
+    assert labels.shape[0] == reno[columns].dropna().shape[0]
+    assert len(labels.kmeans.unique()) == 6
+
+
+def test_cluster_streaming_empty_batch(tmp_path):
+    from sklearn.preprocessing import StandardScaler
+
+    from geosnap.analyze import cluster_streaming
+
+    df = reno.drop(columns="geometry").iloc[:300].reset_index(drop=True)
+    # the second row group has no complete observations
+    df.loc[100:199, columns] = np.nan
+    path = tmp_path / "sparse.parquet"
+    df.to_parquet(path, row_group_size=100)
+    n_complete = df[columns].dropna().shape[0]
+    for pooling in ["pooled", "fixed"]:
+        labels = cluster_streaming(
+            str(path),
+            n_clusters=3,
+            columns=columns,
+            pooling=pooling,
+            batch_size=100,
+            random_state=0,
+        )
+        assert labels.shape[0] == n_complete
+        assert labels.kmeans.notna().all()
+
+    unscaled = cluster_streaming(
+        str(path),
+        n_clusters=3,
+        columns=columns,
+        scaler=StandardScaler(with_mean=False, with_std=False),
+        batch_size=100,
+        random_state=0,
+    )
+    raw = cluster_streaming(
+        str(path), n_clusters=3, columns=columns, scaler=None, batch_size=100, random_state=0
+    )
+    assert_array_equal(unscaled.kmeans.values, raw.kmeans.values)
+
+
+def test_streaming_moments_constant(tmp_path):
+    from sklearn.preprocessing import StandardScaler
+
+    from geosnap.analyze.geodemo import _iter_feature_batches, _streaming_moments
+
+    # a constant feature is left unscaled, as sklearn does
+    df = reno.drop(columns="geometry").dropna(subset=columns).assign(constant=0.1)
+    path = tmp_path / "constant.parquet"
+    df.to_parquet(path)
+    cols = columns + ["constant"]
+    batches = _iter_feature_batches(str(path), cols, "year", "geoid", 50)
+    (mean, std), = _streaming_moments(batches, "pooled").values()
+    X = df[cols].to_numpy(dtype=float)
+    np.testing.assert_array_almost_equal(
+        (X - mean) / std, StandardScaler().fit_transform(X)
+    )
+
+
+def test_cluster_labels_only():
+    labels, model = cluster(
+        reno,
+        columns=columns,
+        method="ward",
+        labels_only=True,
+        return_model=True,
+    )
+    r = cluster(reno, columns=columns, method="ward")
+    assert list(labels.columns) == ["year", "geoid", "ward"]
+    merged = r.merge(labels, on=["year", "geoid"])
+    assert_array_equal(merged.ward_x.values, merged.ward_y.values)
+    assert "df" not in model.__dict__
+    model.calinski_harabasz_score
+    assert "df" not in model.__dict__
+    assert model.df.geometry.notna().all()
+
+
+def test_predict():
+    train = reno[reno.year < 2010]
+    r, model = cluster(
+        train,
+        columns=columns,
+        method="kmeans",
+        n_clusters=5,
+        random_state=0,
+        return_model=True,
+    )
+    predicted = model.predict(train)
+    assert_array_equal(predicted.kmeans.dropna(), r.kmeans.dropna())
+    new = model.predict(reno[reno.year == 2010])
+    assert new.kmeans.dropna().isin(r.kmeans.dropna().unique()).all()
+    # observations are aligned by position, so the index may repeat
+    doubled = model.predict(pd.concat([train, train]))
+    assert_array_equal(doubled.kmeans.dropna(), np.tile(r.kmeans.dropna(), 2))
+    # new data are rescaled with the fitted statistics, so a shift is not removed
+    shifted = train.assign(
+        **{col: train[col] + 10 * train[col].std() for col in columns}
+    )
+    assert (model.predict(shifted).kmeans.dropna() != r.kmeans.dropna()).any()
+
+
+def test_cluster_many():
+    models = cluster_many(
+        reno,
+        methods=["ward", "kmeans"],
+        n_clusters=[5, 6],
+        columns=columns,
+        random_state=0,
+    )
+    assert list(models.keys()) == ["ward_5", "ward_6", "kmeans_5", "kmeans_6"]
+    assert models.ward_5.X is models.kmeans_6.X
+    r = cluster(reno, columns=columns, method="ward", n_clusters=5)
+    merged = r.merge(models.ward_5.df, on=["year", "geoid"])
+    assert_array_equal(merged.ward.values, merged.ward_5.values)
+
+
+def test_graph_cache(tmp_path):
+    from geosnap.analyze import clear_graph_cache, set_graph_cache
+
+    set_graph_cache(cache_dir=tmp_path)
+    clear_graph_cache()
+    r = regionalize(reno, columns=columns, method="ward_spatial", n_clusters=7)
+    assert len(list(tmp_path.glob("*.parquet"))) > 0
+    clear_graph_cache()
+    cached = regionalize(reno, columns=columns, method="ward_spatial", n_clusters=7)
+    set_graph_cache()
+    assert_array_equal(r.ward_spatial.values, cached.ward_spatial.values)
+
+
+def test_regionalize_graph():
+    from libpysal.graph import Graph
+
+    reno_2010 = reno[reno.year == 2010]
+    g = Graph.build_contiguity(reno_2010.set_index("geoid"), rook=True)
+    r = regionalize(reno_2010, columns=columns, method="ward_spatial", n_clusters=7)
+    with_graph = regionalize(
+        reno_2010,
+        columns=columns,
+        method="ward_spatial",
+        n_clusters=7,
+        spatial_weights=g,
+    )
+    assert_array_equal(r.ward_spatial.values, with_graph.ward_spatial.values)
+
+
+def test_connected_weights():
+    from libpysal.weights import W, Queen
+
+    from geosnap.analyze._graphs import connected_weights
+
+    reno_2010 = reno[reno.year == 2010].reset_index(drop=True)
+    w = Queen.from_dataframe(reno_2010, silence_warnings=True)
+    # cut the first unit off from its neighbors
+    neighbors = {
+        i: [j for j in js if 0 not in (i, j)] for i, js in w.neighbors.items()
+    }
+    w = W(neighbors, silence_warnings=True)
+    assert w.n_components == 2
+
+    w0 = connected_weights(reno_2010, w)
+    assert w0.n_components == 1
+    centroids = reno_2010.centroid
+    assert w0.neighbors[0] == [centroids.iloc[1:].distance(centroids[0]).idxmin()]
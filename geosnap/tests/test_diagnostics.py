@@ -35,6 +35,36 @@ def test_find_region_k():
     assert_array_almost_equal(ks.values[0], [2.0, 2.0, 2.0, 2.0, 2.0])
 
 
+def test_find_region_k_matches_regionalize():
+    _, table = find_region_k(
+        reno,
+        columns=columns,
+        method="ward_spatial",
+        min_k=5,
+        max_k=5,
+        return_table=True,
+    )
+    _, models = regionalize(
+        reno, columns=columns, method="ward_spatial", n_clusters=5, return_model=True
+    )
+    model = models[2010]
+    # both score the same labels on the same rescaled features
+    metrics = ["silhouette_score", "calinski_harabasz_score", "davies_bouldin_score"]
+    assert_array_almost_equal(
+        table.loc[5, metrics].astype(float),
+        [
+            model.silhouette_score,
+            model.calinski_harabasz_score,
+            model.davies_bouldin_score,
+        ],
+    )
+    boundary = model.boundary_silhouette.boundary_silhouette
+    assert_array_almost_equal(
+        table.loc[5, ["path_silhouette", "boundary_silhouette"]].astype(float),
+        [model.path_silhouette.path_silhouette.mean(), boundary[boundary != 0].mean()],
+    )
+
+
 def test_cluster_diagnostics():
     ward, ward_mod = cluster(
         reno, columns=columns, method="ward", n_clusters=5, return_model=True
@@ -42,6 +72,7 @@ def test_cluster_diagnostics():
     assert round(ward_mod.silhouette_score,4) == 0.2991
     assert round(ward_mod.davies_bouldin_score,4) == 1.0336
     assert round(ward_mod.calinski_harabasz_score,3) == 88.663
+    assert ward_mod.X.shape == (ward_mod.df.shape[0], len(columns))
 
 
 def test_region_diagnostics():
@@ -52,3 +83,142 @@ def test_region_diagnostics():
     assert round(ward_mod[2010].path_silhouette.path_silhouette.mean(),4) ==  -0.0801
     assert round(ward_mod[2010].silhouette_scores.silhouette_score.mean(),4) ==0.063
     assert ward_mod[2010].nearest_label.nearest_label.sum() == 206
+
+
+def test_sparse_region_silhouettes():
+    import esda
+
+    ward, ward_mod = regionalize(
+        reno, columns=columns, method="ward_spatial", n_clusters=5, return_model=True
+    )
+    mod = ward_mod[2010]
+    assert_array_almost_equal(
+        mod.boundary_silhouette.boundary_silhouette,
+        esda.boundary_silhouette(mod.X, mod.labels, mod.W),
+    )
+    assert_array_almost_equal(
+        mod.path_silhouette.path_silhouette,
+        esda.path_silhouette(mod.X, mod.labels, mod.W),
+    )
+
+
+def test_approximate_silhouettes():
+    ward, ward_mod = cluster(
+        reno, columns=columns, method="ward", n_clusters=5, return_model=True
+    )
+    exact = ward_mod.silhouette_scores.silhouette_score
+    blockwise = ward_mod.compute_silhouette_scores(
+        "blockwise", chunk_size=10
+    ).silhouette_score
+    assert_array_almost_equal(exact, blockwise)
+
+    sampled = ward_mod.compute_silhouette_scores(
+        "sampled", sample_size=50, random_state=0
+    ).silhouette_score
+    assert sampled.notna().sum() >= 50
+    simplified = ward_mod.compute_silhouette_scores("simplified").silhouette_score
+    assert simplified.between(-1, 1).all()
+
+
+def test_find_k_estimator():
+    summary, table = find_k(
+        reno, columns=columns, method="ward", max_k=4, return_table=True
+    )
+    assert summary.attrs["silhouette_estimator"] == "exact"
+    assert (table.silhouette_estimator == "exact").all()
+
+
+def test_find_k_parallel():
+    _, serial = find_k(
+        reno, columns=columns, method="kmeans", max_k=5, n_jobs=1, return_table=True
+    )
+    _, parallel = find_k(
+        reno, columns=columns, method="kmeans", max_k=5, n_jobs=2, return_table=True
+    )
+    assert_array_almost_equal(
+        serial.silhouette_score.values, parallel.silhouette_score.values
+    )
+    _, serial = find_region_k(
+        reno,
+        columns=columns,
+        method="ward_spatial",
+        max_k=4,
+        n_jobs=1,
+        return_table=True,
+    )
+    _, parallel = find_region_k(
+        reno,
+        columns=columns,
+        method="ward_spatial",
+        max_k=4,
+        n_jobs=2,
+        return_table=True,
+    )
+    assert_array_almost_equal(
+        serial.path_silhouette.values, parallel.path_silhouette.values
+    )
+
+
+def test_find_k_warm_start():
+    from sklearn.cluster import AgglomerativeClustering
+    from sklearn.metrics import adjusted_rand_score
+    from sklearn.preprocessing import StandardScaler
+
+    from geosnap.analyze._cluster_wrappers import ward_path
+
+    warm = find_k(
+        reno,
+        columns=columns,
+        method="kmeans",
+        max_k=6,
+        random_state=0,
+        warm_start=True,
+    )
+    cold = find_k(reno, columns=columns, method="kmeans", max_k=6, random_state=0)
+    assert warm.shape == cold.shape
+    assert warm.values.min() >= 2
+    assert warm.values.max() <= 6
+
+    # cutting one dendrogram gives the same partitions as fitting each k
+    X = StandardScaler().fit_transform(reno[columns].dropna().values)
+    ks = range(2, 12)
+    labels = ward_path(X, ks)
+    for k in ks:
+        fitted = AgglomerativeClustering(n_clusters=k, linkage="ward").fit(X)
+        assert adjusted_rand_score(labels[k], fitted.labels_) == 1.0
+
+
+def test_kmeans_path_large():
+    import numpy as np
+
+    from geosnap.analyze._cluster_wrappers import kmeans_path
+
+    # above 12000 rows the path runs on MiniBatchKMeans, which has no `algorithm`
+    X = np.random.default_rng(0).random((12001, 3))
+    labels = kmeans_path(X, [2, 3], random_state=0, algorithm="elkan")
+    assert len(np.unique(labels[3])) == 3
+
+
+def test_save_load(tmp_path):
+    from geosnap.analyze import ModelResults
+
+    _, model = regionalize(
+        reno,
+        columns=columns,
+        method="ward_spatial",
+        n_clusters=5,
+        return_model=True,
+    )
+    model = model[2010]
+    model.path_silhouette
+    model.save(tmp_path / "model")
+    loaded = ModelResults.load(tmp_path / "model")
+    assert_array_equal(loaded.labels, model.labels)
+    assert_array_almost_equal(
+        loaded.path_silhouette.path_silhouette.values,
+        model.path_silhouette.path_silhouette.values,
+    )
+    assert_array_almost_equal(
+        loaded.boundary_silhouette.boundary_silhouette.values,
+        model.boundary_silhouette.boundary_silhouette.values,
+    )
@@ -103,3 +103,33 @@ def test_sequence():
     )
     values = np.array([3, 3, 0, 2, 3, 2])
     np.testing.assert_allclose(output[1].values[0], values, RTOL)
+
+
+def test_transition_sparse():
+    from giddy.markov import Spatial_Markov
+    from libpysal.graph import Graph
+
+    from geosnap.io import get_acs
+
+    dc = get_acs(DataStore(), state_fips="11", years=[2015, 2016, 2017], level="tract")
+    dc = cluster(
+        dc,
+        columns=["median_household_income", "p_poverty_rate", "p_unemployment_rate"],
+        method="kmeans",
+        n_clusters=4,
+        random_state=0,
+    )
+    np.random.seed(0)
+    sm = transition(dc, cluster_col="kmeans", w_type="queen", permutations=9)
+
+    wide = dc.pivot(index="geoid", columns="year", values="kmeans").dropna()
+    geoms = dc.drop_duplicates("geoid").set_index("geoid").loc[wide.index]
+    np.random.seed(0)
+    expected = Spatial_Markov(
+        wide.values, Graph.build_contiguity(geoms, rook=False).to_W(), discrete=True
+    )
+    np.testing.assert_allclose(sm.T, expected.T)
+    np.testing.assert_allclose(sm.P, expected.P)
+    np.testing.assert_allclose(sm.p, expected.p)
+    assert sm.x2_realizations.shape == (9, 1)
+    assert 0 < sm.x2_rpvalue <= 1
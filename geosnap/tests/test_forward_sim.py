@@ -1,6 +1,11 @@
 from geosnap import DataStore
 from geosnap.io import get_acs
-from geosnap.analyze import cluster, predict_markov_labels
+from geosnap.analyze import (
+    cluster,
+    predict_markov_labels,
+    simulate_ensemble,
+    transition,
+)
 from geosnap.harmonize import harmonize
 
 columns = ["median_household_income", "p_poverty_rate", "p_unemployment_rate"]
@@ -37,3 +42,151 @@ def test_multi_simulation():
 
     simulated = dc_mod.predict_markov_labels(base_year=2017, time_steps=3, increment=1)
     assert simulated.shape == (708, 4)
+
+
+def test_simulation_seed():
+    dc = get_acs(state_fips="11", datastore=DataStore(), years=[2015, 2016, 2017], level='tract')
+    dc = cluster(dc, columns=columns, method="kmeans", n_clusters=3, random_state=0)
+
+    first = predict_markov_labels(dc, cluster_col='kmeans', base_year=2017, seed=1)
+    second = predict_markov_labels(dc, cluster_col='kmeans', base_year=2017, seed=1)
+    assert (first.predicted.values == second.predicted.values).all()
+    assert set(first.predicted.unique()) <= set(dc.kmeans.unique())
+
+
+def test_simulate_ensemble():
+    import pytest
+    from libpysal.weights import Rook
+
+    dc = get_acs(state_fips="11", datastore=DataStore(), years=[2015, 2016, 2017], level='tract')
+    dc = cluster(dc, columns=columns, method="kmeans", n_clusters=3, random_state=0)
+    dc = dc.dropna(subset=["kmeans"])
+    smk = transition(dc, cluster_col="kmeans", w_type="rook")
+    w = Rook.from_dataframe(dc[dc.year == 2017], silence_warnings=True)
+
+    ensemble = simulate_ensemble(
+        smk, dc, w, n_replicates=10, time_steps=2, label_column="kmeans", seed=0
+    )
+    n_units = (dc.year == 2017).sum()
+    assert ensemble.class_shares.shape == (20, 3)
+    assert ensemble.unit_probabilities.shape == (2 * n_units, 3)
+    assert (ensemble.unit_probabilities.sum(axis=1).round(8) == 1).all()
+
+    # labels the transition model has never seen cannot be simulated
+    unknown = dc.assign(kmeans=dc.kmeans.where(dc.year != 2017, 99))
+    with pytest.raises(ValueError, match="99"):
+        simulate_ensemble(smk, unknown, w, n_replicates=2, label_column="kmeans")
+
+
+def test_categorical_lag():
+    import numpy as np
+    from libpysal.weights import lat2W
+    from scipy import sparse
+
+    from geosnap.analyze.dynamics import _categorical_lag, _lag_labels
+
+    w = lat2W(3, 3)
+    y = np.array(['a', 'b', 'a', 'b', 'c', 'b', 'c', 'b', 'c'])
+    lag = _lag_labels(sparse.csr_matrix(w.sparse), y)
+    assert (lag == np.array(['b', 'a', 'b', 'c', 'b', 'c', 'b', 'c', 'b'])).all()
+
+    codes = np.unique(y, return_inverse=True)[1]
+    batch = _categorical_lag(sparse.csr_matrix(w.sparse), np.stack([codes, codes]), 3)
+    assert batch.shape == (2, 9)
+    assert (np.array(['a', 'b', 'c'])[batch[1]] == lag).all()
+
+
+def test_unknown_labels():
+    from types import SimpleNamespace
+
+    import numpy as np
+    import pytest
+    from libpysal.weights import lat2W
+    from scipy import sparse
+
+    from geosnap.analyze.dynamics import _draw_labels
+
+    adjacency = sparse.csr_matrix(lat2W(3, 3).sparse)
+    markov = SimpleNamespace(
+        classes=np.array(["a", "b"]), P=np.full((2, 2, 2), 0.5), p=np.full((2, 2), 0.5)
+    )
+    labels = np.array(["a", "b", "a", "b", "z", "b", "a", "b", "a"])
+    with pytest.raises(ValueError, match="'z'"):
+        _draw_labels(adjacency, labels, markov, np.arange(9), verbose=False)
+
+
+def test_conditional_draws():
+    from types import SimpleNamespace
+
+    import numpy as np
+    import pytest
+    from numpy.random import default_rng
+
+    from geosnap.analyze.dynamics import (
+        _conditional_probs_from_smk,
+        _draw_labels_from_probs,
+    )
+
+    classes = np.array(["a", "b", "c"])
+    probs = default_rng(0).random((200, 3))
+    probs /= probs.sum(axis=1, keepdims=True)
+    # the vectorized sampler reproduces a loop of seeded rng.choice draws
+    rng = default_rng(42)
+    expected = [rng.choice(classes, p=row) for row in probs]
+    assert (_draw_labels_from_probs(classes, probs, seed=42) == expected).all()
+
+    P = np.tile(np.eye(3), (3, 1, 1))
+    P[1, 0] = 0  # no spatial rule for label "a" with context "b"
+    smk = SimpleNamespace(classes=classes, P=P, p=np.full((3, 3), 2.0))
+    labels = np.array(["a", "a", "b", "c"])
+    lags = np.array(["a", "b", "b", "b"])
+    with pytest.warns(UserWarning, match="falling back"):
+        conditional = _conditional_probs_from_smk(labels, lags, smk)
+    # only the unit without a spatial rule falls back to the aspatial rates
+    np.testing.assert_array_equal(
+        conditional, [[1, 0, 0], [1 / 3, 1 / 3, 1 / 3], [0, 1, 0], [0, 0, 1]]
+    )
+    with pytest.raises(ValueError, match="No spatial transition rules"):
+        _conditional_probs_from_smk(labels, lags, smk, fill_null_probs=False)
+    with pytest.raises(ValueError, match="'z'"):
+        _conditional_probs_from_smk(labels, np.array(["a", "z", "b", "b"]), smk)
+
+
+def test_classes_without_transitions():
+    from types import SimpleNamespace
+
+    import numpy as np
+    from numpy.random import default_rng
+
+    from geosnap.analyze.dynamics import _sample_classes, _transition_table
+
+    # class "c" is never left in the data, so it has no transition rules at all
+    P = np.full((3, 3, 3), 0.5)
+    P[:, :, 2] = 0
+    P[:, 2] = 0
+    p = P[0].copy()
+    smk = SimpleNamespace(classes=np.array(["a", "b", "c"]), P=P, p=p)
+    codes = np.array([0, 1, 2, 2, 2])
+    lags = np.array([2, 2, 0, 1, 2])
+    for aspatial in [False, True]:
+        table = _transition_table(smk, aspatial=aspatial)
+        assert np.isfinite(table).all()
+        draws = _sample_classes(table[lags, codes], default_rng(0).random(5))
+        # units in "c" stay put instead of all being drawn into "a"
+        assert (draws[2:] == 2).all()
+        assert (draws[:2] != 2).all()
+
+
+def test_wide_simulation():
+    dc = get_acs(state_fips="11", datastore=DataStore(), years=[2015, 2016, 2017], level='tract')
+    dc = cluster(dc, columns=columns, method="kmeans", n_clusters=3, random_state=0)
+
+    long = predict_markov_labels(
+        dc, cluster_col='kmeans', base_year=2017, time_steps=3, increment=1, seed=0
+    )
+    wide = predict_markov_labels(
+        dc, cluster_col='kmeans', base_year=2017, time_steps=3, increment=1, seed=0, wide=True
+    )
+    assert wide.shape == (177, 3)
+    assert list(wide.columns) == [2018, 2019, 2020]
+    assert (long[long.year == 2020].predicted.values == wide[2020].values).all()
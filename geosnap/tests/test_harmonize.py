@@ -1,10 +1,11 @@
 import os
 
+import pytest
 import quilt3
-from numpy.testing import assert_allclose
+from numpy.testing import assert_allclose, assert_array_equal
 
 from geosnap import DataStore
-from geosnap.harmonize import harmonize
+from geosnap.harmonize import estimate_harmonize_cost, harmonize
 from geosnap.io import get_census
 
 def test_harmonize_area():
@@ -75,3 +76,71 @@ def test_harmonize_target_gdf():
         8832.8796,
         rtol=1,
     )
+
+
+def test_harmonize_append():
+
+    balt = get_census(county_fips="24510", datastore=DataStore())
+    kwargs = dict(
+        extensive_variables=["n_total_housing_units"],
+        intensive_variables=["p_vacant_housing_units"],
+    )
+    full = harmonize(balt, 2000, **kwargs)
+    partial = harmonize(balt[balt.year != 2010], 2000, **kwargs)
+    appended = harmonize(balt, append_to=partial, **kwargs)
+
+    assert appended.shape == full.shape
+    assert (appended.dtypes == full.dtypes).all()
+    assert_allclose(
+        appended[appended.year == 2010].n_total_housing_units.sum(),
+        full[full.year == 2010].n_total_housing_units.sum(),
+    )
+
+
+def test_harmonize_cost_and_profile():
+
+    balt = get_census(county_fips="24510", datastore=DataStore())
+    kwargs = dict(
+        extensive_variables=["n_total_housing_units"],
+        intensive_variables=["p_vacant_housing_units"],
+    )
+    estimate = harmonize(balt, 2000, dry_run=True, **kwargs)
+    assert sorted(estimate.index.tolist()) == [1990, 2010]
+    assert (estimate.n_candidate_pairs > 0).all()
+    assert (estimate.est_memory_mb > 0).all()
+    assert_array_equal(
+        estimate.n_candidate_pairs,
+        estimate_harmonize_cost(balt, 2000, **kwargs).n_candidate_pairs,
+    )
+
+    harmonized, profile = harmonize(balt, 2000, return_profile=True, **kwargs)
+    assert sorted(profile.index.tolist()) == [1990, 2010]
+    # the bbox join is an upper bound on the number of intersecting pairs
+    assert (profile.n_pairs <= estimate.loc[profile.index].n_candidate_pairs).all()
+    assert_allclose(profile.total, profile[["overlay", "aggregation"]].sum(axis=1))
+    assert_allclose(
+        estimate.est_seconds,
+        estimate[["est_overlay_seconds", "est_aggregation_seconds"]].sum(axis=1),
+    )
+    # dasymetric masking is not modeled
+    with pytest.warns(UserWarning, match="lower bounds"):
+        harmonize(balt, 2000, dry_run=True, weights_method="dasymetric", **kwargs)
+
+
+def test_harmonize_float32():
+
+    balt = get_census(county_fips="24510", datastore=DataStore())
+    kwargs = dict(
+        extensive_variables=["n_total_housing_units"],
+        intensive_variables=["p_vacant_housing_units"],
+    )
+    harmonized = harmonize(balt, 2000, **kwargs)
+    harmonized_32 = harmonize(balt, 2000, dtype="float32", sparse_threshold=0, **kwargs)
+
+    assert harmonized_32.p_vacant_housing_units.dtype == "float32"
+    assert harmonized_32.n_total_housing_units.dtype == "Sparse[float32, 0]"
+    assert_allclose(
+        harmonized_32.n_total_housing_units.sparse.to_dense().sum(),
+        harmonized.n_total_housing_units.sum(),
+        rtol=1e-5,
+    )